@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Benchmark: generación en una sola llamada vs. map-reduce para listas largas de actividades.
+
+USO:
+  GEMINI_API_KEY=... python scripts/benchmark_map_reduce.py --sizes 50 200 500 --runs 3
+
+Para cada tamaño genera una lista sintética de actividades y mide, en ambos modos,
+la latencia y la precisión de longitud respecto a MAX_CHARS (error absoluto y
+porcentaje de reportes dentro de la ventana objetivo). Hace llamadas reales al modelo.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src import genkit_flow  # noqa: E402
+from src.runtime_config import runtime_config  # noqa: E402
+
+VERBOS = ["Revisé", "Desarrollé", "Documenté", "Probé", "Corregí", "Diseñé", "Configuré", "Analicé"]
+OBJETOS = [
+    "el módulo de autenticación", "los reportes mensuales", "la base de datos de alumnos",
+    "el flujo de despliegue", "las pruebas de integración", "la interfaz de captura",
+    "el inventario de equipos", "la documentación del API",
+]
+DETALLES = [
+    "junto con el equipo de soporte", "para el área de servicio social", "siguiendo el plan semanal",
+    "a petición de la coordinación", "con énfasis en el rendimiento", "y registré los resultados",
+]
+
+
+def actividades_sinteticas(n: int, seed: int) -> list:
+    rnd = random.Random(seed)
+    return [f"{rnd.choice(VERBOS)} {rnd.choice(OBJETOS)} {rnd.choice(DETALLES)}" for _ in range(n)]
+
+
+async def medir(modo, actividades, cfg):
+    start = time.perf_counter()
+    result = await modo(actividades, cfg)
+    return time.perf_counter() - start, len(result.report), result.degraded
+
+
+def resumen(nombre, muestras, min_chars, max_chars):
+    latencias = [m[0] for m in muestras]
+    longitudes = [m[1] for m in muestras]
+    errores = [abs(max_chars - n) for n in longitudes]
+    en_ventana = sum(1 for n in longitudes if min_chars <= n <= max_chars)
+    degradados = sum(1 for m in muestras if m[2])
+    print(
+        f"  {nombre:<11} latencia media={statistics.mean(latencias):6.2f}s "
+        f"max={max(latencias):6.2f}s | error longitud medio={statistics.mean(errores):6.0f} chars "
+        f"| en ventana={en_ventana}/{len(muestras)} | degradados={degradados}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if genkit_flow.ai is None:
+        print("ERROR: Define GEMINI_API_KEY en el entorno antes de ejecutar (el benchmark llama al modelo).")
+        sys.exit(2)
+
+    cfg = runtime_config.current
+    min_chars, _ = genkit_flow._length_window(cfg.max_chars)
+    print(
+        f"MAX_CHARS={cfg.max_chars} ventana=[{min_chars}, {cfg.max_chars}] "
+        f"umbral={cfg.map_reduce_threshold_tokens} tokens bloque={cfg.map_chunk_tokens} tokens "
+        f"concurrencia={cfg.map_concurrency}"
+    )
+    for size in args.sizes:
+        print(f"\n{size} actividades:")
+        single, mapreduce = [], []
+        for run in range(args.runs):
+            actividades = actividades_sinteticas(size, seed=run)
+            single.append(await medir(genkit_flow._generar_single, actividades, cfg))
+            mapreduce.append(await medir(genkit_flow._generar_map_reduce, actividades, cfg))
+        resumen("single", single, min_chars, cfg.max_chars)
+        resumen("map-reduce", mapreduce, min_chars, cfg.max_chars)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
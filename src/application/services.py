@@ -1,16 +1,682 @@
-from typing import Optional
+import asyncio
+import base64
+import csv
+import hashlib
+import io
+import json
+import logging
+import re
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Type, TypeVar
 
 from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
 
-from ..domain.errors import UserAlreadyExistsError, InvalidCredentialsError
-from ..domain.models import ReportRequest, ReportResponse, AuthTokenResponse, User
-from ..genkit_flow import generar_reporte
-from ..infrastructure.api.repositories.supabase_auth_repository import SupabaseAuthRepository
+from ..domain.errors import (
+    UserAlreadyExistsError,
+    InvalidCredentialsError,
+    IdempotencyKeyReuseError,
+    IdempotencyRequestInProgressError,
+    InvalidCursorError,
+    AuthRateLimitedError,
+)
+from ..domain.models import (
+    ReportRequest,
+    ReportResponse,
+    AuthTokenResponse,
+    User,
+    ReportHistoryEntry,
+    ReportHistoryPage,
+    PeriodReportRequest,
+    PeriodReportResponse,
+    PeriodSummary,
+    DraftResponse,
+    LoginRequest,
+    BulkAccountResult,
+    UsageRecord,
+    UsageReport,
+    UsageTotals,
+)
+from ..domain.repositories import (
+    IdempotencyRepository,
+    ReportHistoryRepository,
+    PeriodSummaryRepository,
+    UsageRepository,
+)
+from ..genkit_flow import generar_reporte, componer_reporte, child_summary_chars, load_shedder
+from ..infrastructure.write_behind import WriteBehindBuffer
+from ..usage import UsageLedger
+from ..infrastructure.api.repositories.supabase_auth_repository import SupabaseAdminAuthRepository, SupabaseAuthRepository
+
+logger = logging.getLogger(__name__)
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+# Ids del historial: uuid4().hex
+_HISTORY_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+
+class ReportHistoryService:
+    """Guarda los reportes generados por usuario y los pagina por cursor.
+
+    Las escrituras pasan por un buffer write-behind: `record` solo encola en memoria y
+    una tarea de fondo inserta por lotes. Las lecturas combinan el almacén con lo que
+    aún está pendiente, para que el usuario vea su último reporte de inmediato.
+    """
+
+    def __init__(self, repository: ReportHistoryRepository, buffer: WriteBehindBuffer[ReportHistoryEntry]):
+        self.repository = repository
+        self.buffer = buffer
+
+    async def start(self) -> None:
+        await self.buffer.start()
+
+    async def stop(self) -> None:
+        await self.buffer.stop()
+
+    def record(self, user: User, report_request: ReportRequest, report: ReportResponse) -> ReportHistoryEntry:
+        entry = ReportHistoryEntry(
+            id=uuid.uuid4().hex,
+            user_id=user.id,
+            actividades=report_request.actividades,
+            report=report.report,
+            degraded=report.degraded,
+            created_at=datetime.now(timezone.utc).isoformat(timespec="microseconds"),
+        )
+        self.buffer.add(entry)
+        return entry
+
+    @staticmethod
+    def encode_cursor(entry: ReportHistoryEntry) -> str:
+        raw = json.dumps([entry.created_at, entry.id]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, str]:
+        """Decodifica y valida el cursor; sus valores acaban en el filtro de la consulta."""
+        try:
+            created_at, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            moment = datetime.fromisoformat(created_at)
+        except Exception:
+            raise InvalidCursorError()
+        if moment.tzinfo is None or not isinstance(entry_id, str) or not _HISTORY_ID_RE.fullmatch(entry_id):
+            raise InvalidCursorError()
+        # Mismo formato que `created_at` al guardarse, para comparar como texto
+        return moment.astimezone(timezone.utc).isoformat(timespec="microseconds"), entry_id
+
+    async def list_history(self, user_id: str, limit: int, cursor: Optional[str] = None) -> ReportHistoryPage:
+        before = self.decode_cursor(cursor) if cursor else None
+        # Se pide uno de más para saber si existe una página siguiente
+        stored = await asyncio.to_thread(self.repository.list_by_user, user_id, limit + 1, before)
+
+        pending = [
+            e for e in self.buffer.pending()
+            if e.user_id == user_id and (before is None or (e.created_at, e.id) < before)
+        ]
+        by_id = {e.id: e for e in stored}
+        by_id.update((e.id, e) for e in pending)
+        items = sorted(by_id.values(), key=lambda e: (e.created_at, e.id), reverse=True)
+
+        has_more = len(items) > limit
+        items = items[:limit]
+        next_cursor = self.encode_cursor(items[-1]) if has_more and items else None
+        return ReportHistoryPage(items=items, next_cursor=next_cursor)
+
+
+@dataclass
+class _Draft:
+    key: str
+    created_at: float
+    task: Optional[asyncio.Task] = None
+    started: bool = False
+
+
+class DraftService:
+    """Pre-generación especulativa mientras el usuario aún agrega actividades.
+
+    Cada usuario tiene como máximo un borrador: uno nuevo reemplaza (y cancela) al
+    anterior. La generación arranca tras `debounce` segundos sin cambios, solo si el
+    servicio no está sobrecargado, el usuario no superó `max_per_hour` generaciones
+    especulativas y hay menos de `max_concurrent` borradores generándose en total.
+    Cuando llega el POST final con las mismas actividades (ignorando mayúsculas,
+    espacios, puntuación final y entradas vacías) se devuelve el resultado o se espera
+    la generación en curso.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[ReportRequest], Awaitable[ReportResponse]],
+        debounce: float,
+        ttl: float,
+        max_per_hour: int,
+        max_concurrent: int,
+    ):
+        self._generate = generate
+        self.debounce = debounce
+        self.ttl = ttl
+        self.max_per_hour = max_per_hour
+        self.max_concurrent = max_concurrent
+        self._drafts: Dict[str, _Draft] = {}
+        self._started: Dict[str, Deque[float]] = {}
+        self._running = 0
+        self._last_purge = time.monotonic()
+
+    @staticmethod
+    def draft_key(report_request: ReportRequest) -> str:
+        normalized = [" ".join(a.split()).casefold().rstrip(" .;,") for a in report_request.actividades]
+        body = json.dumps([a for a in normalized if a], ensure_ascii=False)
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    def _expired(self, draft: _Draft) -> bool:
+        return time.monotonic() - draft.created_at > self.ttl
+
+    def _purge(self) -> None:
+        """Quita borradores caducados y contadores vacíos (como mucho una vez por minuto),
+        para que la memoria no crezca con cada usuario que alguna vez escribió."""
+        now = time.monotonic()
+        if now - self._last_purge < min(self.ttl, 60):
+            return
+        self._last_purge = now
+        for user_id in [u for u, d in self._drafts.items() if self._expired(d)]:
+            self.cancel(user_id)
+        cutoff = now - 3600
+        for user_id in list(self._started):
+            started = self._started[user_id]
+            while started and started[0] < cutoff:
+                started.popleft()
+            if not started:
+                del self._started[user_id]
+
+    def _quota_available(self, user_id: str) -> bool:
+        started = self._started.setdefault(user_id, deque())
+        cutoff = time.monotonic() - 3600
+        while started and started[0] < cutoff:
+            started.popleft()
+        return len(started) < self.max_per_hour
+
+    def cancel(self, user_id: str) -> bool:
+        draft = self._drafts.pop(user_id, None)
+        if draft is None:
+            return False
+        draft.task.cancel()
+        return True
+
+    def submit(self, user_id: str, report_request: ReportRequest) -> DraftResponse:
+        self._purge()
+        key = self.draft_key(report_request)
+        current = self._drafts.get(user_id)
+        if current is not None and current.key == key and not self._expired(current):
+            if current.task.done() and not current.task.cancelled() and current.task.result() is not None:
+                return DraftResponse(status="ready")
+            if not current.task.done():
+                return DraftResponse(status="pending")
+
+        self.cancel(user_id)
+        if not any(a.strip() for a in report_request.actividades):
+            return DraftResponse(status="skipped", reason="Sin actividades")
+        if not self._quota_available(user_id):
+            return DraftResponse(status="skipped", reason="Límite de borradores por hora alcanzado")
+
+        draft = _Draft(key=key, created_at=time.monotonic())
+        draft.task = asyncio.create_task(self._run(user_id, draft, report_request))
+        self._drafts[user_id] = draft
+        return DraftResponse(status="scheduled")
+
+    async def _run(self, user_id: str, draft: _Draft, report_request: ReportRequest) -> Optional[ReportResponse]:
+        await asyncio.sleep(self.debounce)
+        # Baja prioridad: no especular si el modelo está cargado o hay demasiados borradores
+        if load_shedder.overloaded() or self._running >= self.max_concurrent:
+            return None
+        if not self._quota_available(user_id):
+            return None
+        self._started.setdefault(user_id, deque()).append(time.monotonic())
+        draft.started = True
+        self._running += 1
+        try:
+            report = await self._generate(report_request)
+        except Exception:
+            return None
+        finally:
+            self._running -= 1
+        # Un borrador degradado no se reutiliza: el POST final intentará con el modelo
+        return None if report.degraded else report
+
+    async def take(self, user_id: str, report_request: ReportRequest) -> Optional[ReportResponse]:
+        """Consume el borrador del usuario si coincide con la petición final."""
+        self._purge()
+        draft = self._drafts.get(user_id)
+        if draft is None or draft.key != self.draft_key(report_request) or self._expired(draft):
+            return None
+        del self._drafts[user_id]
+        if not draft.started:
+            # Aún en espera de debounce: más rápido generar directamente
+            draft.task.cancel()
+            return None
+        try:
+            return await asyncio.shield(draft.task)
+        except asyncio.CancelledError:
+            if draft.task.cancelled():
+                return None
+            raise
 
 
 class ReportService:
-    async def create_report(self, report_request: ReportRequest) -> ReportResponse:
-        return await generar_reporte(report_request)
+    def __init__(self, history: Optional[ReportHistoryService] = None, drafts: Optional[DraftService] = None):
+        self.history = history
+        self.drafts = drafts
+
+    async def create_report(self, report_request: ReportRequest, user: Optional[User] = None) -> ReportResponse:
+        report = None
+        if self.drafts is not None and user is not None:
+            report = await self.drafts.take(user.id, report_request)
+        if report is None:
+            report = await generar_reporte(report_request)
+        if self.history is not None and user is not None:
+            self.history.record(user, report_request, report)
+        return report
+
+
+class PeriodReportService:
+    """Reportes incrementales: un periodo largo se compone de los resúmenes guardados de sus
+    subperiodos más solo las actividades nuevas.
+
+    Cada nodo tiene una huella calculada a partir de sus actividades y de las huellas de sus
+    subperiodos; si cambian las actividades de un subperiodo cambia su huella (y la de sus
+    ancestros), así que solo esa rama se vuelve a generar y el resto se reutiliza.
+
+    Con la caché fría un semestre puede tener cientos de subperiodos: como mucho
+    `concurrency` resúmenes se generan a la vez por petición, para no desbordar el
+    controlador de carga y terminar con resúmenes degradados que no se guardan.
+    """
+
+    def __init__(self, repository: PeriodSummaryRepository, concurrency: int = 4):
+        self.repository = repository
+        self.concurrency = concurrency
+
+    @classmethod
+    def fingerprint(cls, node: PeriodReportRequest, memo: Dict[int, str]) -> str:
+        if id(node) not in memo:
+            body = json.dumps(
+                {
+                    "a": [" ".join(a.split()) for a in node.actividades if a.strip()],
+                    "s": [[c.periodo, cls.fingerprint(c, memo)] for c in node.subperiodos],
+                },
+                ensure_ascii=False,
+            )
+            memo[id(node)] = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        return memo[id(node)]
+
+    async def create_period_report(self, user: User, request: PeriodReportRequest) -> PeriodReportResponse:
+        fingerprints: Dict[int, str] = {}
+        self.fingerprint(request, fingerprints)
+        cached = await asyncio.to_thread(self.repository.get_many, user.id, request.periodos())
+        to_save: List[PeriodSummary] = []
+        stats = {"reused": 0, "generated": 0}
+        # Solo acota las llamadas al modelo: un nodo no retiene su cupo mientras espera a sus hijos
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def summarize(node: PeriodReportRequest, max_chars: Optional[int]) -> ReportResponse:
+            # Los subperiodos se guardan como resúmenes compactos (max_chars acotado); el
+            # periodo pedido, a longitud completa, con una huella propia para distinguirlos.
+            fp = fingerprints[id(node)]
+            full_fp = f"{fp}:full"
+            hit = cached.get(node.periodo)
+            if hit is not None and (hit.fingerprint == full_fp or (max_chars is not None and hit.fingerprint == fp)):
+                stats["reused"] += 1
+                return ReportResponse(report=hit.summary)
+
+            children = [c for c in node.subperiodos if c.has_activities()]
+            child_chars = child_summary_chars(len(children))
+            child_reports = await asyncio.gather(*(summarize(c, child_chars) for c in children))
+            async with semaphore:
+                report = await componer_reporte(
+                    [f"Resumen de {c.periodo}: {r.report}" for c, r in zip(children, child_reports)],
+                    node.actividades,
+                    max_chars,
+                )
+            report.degraded = report.degraded or any(r.degraded for r in child_reports)
+
+            stats["generated"] += 1
+            # Los resúmenes degradados no se guardan: se regenerarán con el modelo la próxima vez
+            if not report.degraded:
+                to_save.append(PeriodSummary(
+                    user_id=user.id,
+                    periodo=node.periodo,
+                    fingerprint=fp if max_chars is not None else full_fp,
+                    summary=report.report,
+                    updated_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                ))
+            return report
+
+        report = await summarize(request, None)
+        await asyncio.to_thread(self.repository.save_many, to_save)
+        return PeriodReportResponse(
+            report=report.report,
+            degraded=report.degraded,
+            resumenes_reutilizados=stats["reused"],
+            resumenes_generados=stats["generated"],
+        )
+
+
+class IdempotencyService:
+    """Ejecuta una operación como máximo una vez por (usuario, Idempotency-Key).
+
+    - La primera petición reserva la clave, ejecuta la operación y guarda la respuesta.
+    - Los reintentos con el mismo cuerpo reciben la respuesta guardada sin volver a generar.
+    - Los duplicados concurrentes esperan a que termine la petición original.
+    - Reutilizar la clave con otro cuerpo lanza IdempotencyKeyReuseError.
+
+    La reserva dura `reservation_ttl` segundos y se renueva mientras la petición original
+    sigue en curso, así una generación larga no la pierde; si el proceso muere, la clave
+    queda libre poco después. El almacén se usa desde hilos para no bloquear el event loop.
+    """
+
+    def __init__(
+        self,
+        repository: IdempotencyRepository,
+        ttl: float,
+        wait_timeout: float,
+        reservation_ttl: float = 60.0,
+        poll_interval: float = 0.25,
+    ):
+        self.repository = repository
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.reservation_ttl = reservation_ttl
+        self.poll_interval = poll_interval
+        # Eventos locales para despertar de inmediato a los duplicados del mismo proceso;
+        # los de otros procesos (almacén SQLite compartido) se detectan por sondeo.
+        self._events: Dict[Tuple[str, str], asyncio.Event] = {}
+
+    @staticmethod
+    def fingerprint(payload: BaseModel) -> str:
+        body = json.dumps(payload.model_dump(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    async def run(
+        self,
+        user_id: str,
+        key: str,
+        payload: BaseModel,
+        producer: Callable[[], Awaitable[ResponseT]],
+        response_model: Type[ResponseT],
+    ) -> Tuple[ResponseT, bool]:
+        """Devuelve (respuesta, replayed); replayed es True si la respuesta venía almacenada."""
+        fingerprint = self.fingerprint(payload)
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            existing = await asyncio.to_thread(self.repository.begin, user_id, key, fingerprint, self.reservation_ttl)
+            if existing is None:
+                return await self._execute(user_id, key, producer), False
+
+            if existing.fingerprint != fingerprint:
+                raise IdempotencyKeyReuseError()
+            if existing.completed and existing.response is not None:
+                return response_model(**existing.response), True
+
+            record = await self._wait_for_original(user_id, key, deadline)
+            if record is None:
+                # La petición original falló y liberó la clave: reintentar la reserva
+                continue
+            if record.fingerprint != fingerprint:
+                raise IdempotencyKeyReuseError()
+            return response_model(**record.response), True
+
+    async def _renew(self, user_id: str, key: str) -> None:
+        while True:
+            await asyncio.sleep(self.reservation_ttl / 3)
+            try:
+                await asyncio.to_thread(self.repository.renew, user_id, key, self.reservation_ttl)
+            except Exception as e:
+                logger.warning("No se pudo renovar la reserva de Idempotency-Key: %s", e)
+
+    async def _execute(self, user_id: str, key: str, producer: Callable[[], Awaitable[ResponseT]]) -> ResponseT:
+        event = self._events.setdefault((user_id, key), asyncio.Event())
+        renewer = asyncio.create_task(self._renew(user_id, key))
+        try:
+            response = await producer()
+        except BaseException:
+            renewer.cancel()
+            # shield: la liberación debe completarse aunque la petición se cancele
+            await asyncio.shield(asyncio.to_thread(self.repository.release, user_id, key))
+            raise
+        else:
+            renewer.cancel()
+            await asyncio.shield(
+                asyncio.to_thread(self.repository.complete, user_id, key, response.model_dump(), self.ttl)
+            )
+            return response
+        finally:
+            event.set()
+            self._events.pop((user_id, key), None)
+
+    async def _wait_for_original(self, user_id: str, key: str, deadline: float):
+        """Espera a que la petición original termine. Devuelve el registro completado o None si se liberó."""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyRequestInProgressError()
+            event = self._events.get((user_id, key))
+            try:
+                if event is not None:
+                    await asyncio.wait_for(event.wait(), timeout=min(self.poll_interval, remaining))
+                else:
+                    await asyncio.sleep(min(self.poll_interval, remaining))
+            except asyncio.TimeoutError:
+                pass
+            record = await asyncio.to_thread(self.repository.get, user_id, key)
+            if record is None:
+                return None
+            if record.completed and record.response is not None:
+                return record
+
+
+class UsageService:
+    """Consulta del uso del modelo: lo ya escrito en el almacén más lo pendiente en memoria."""
+
+    def __init__(self, repository: UsageRepository, ledger: UsageLedger):
+        self.repository = repository
+        self.ledger = ledger
+
+    async def start(self) -> None:
+        await self.ledger.start(self.repository.add_many)
+
+    async def stop(self) -> None:
+        await self.ledger.stop()
+
+    @staticmethod
+    def _utc(moment: datetime) -> datetime:
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.astimezone(timezone.utc).replace(microsecond=0)
+
+    async def report(self, user_id: Optional[str], desde: datetime, hasta: datetime) -> UsageReport:
+        # Las filas son por hora: el inicio se redondea al comienzo de su hora
+        since = self._utc(desde).replace(minute=0, second=0).isoformat()
+        until = self._utc(hasta).isoformat()
+        # Lectura consistente: un lote escrito durante la consulta no se cuenta dos veces
+        stored, pending = await self.ledger.snapshot(lambda: self.repository.list_usage(user_id, since, until))
+
+        merged: Dict[Tuple[str, str, str, str], UsageRecord] = {}
+        for record in [*stored, *pending]:
+            if (user_id is not None and record.user_id != user_id) or not since <= record.hour < until:
+                continue
+            key = (record.user_id, record.client, record.hour, record.model)
+            current = merged.get(key)
+            if current is None:
+                merged[key] = record
+                continue
+            merged[key] = current.model_copy(update={
+                "requests": current.requests + record.requests,
+                "fallbacks": current.fallbacks + record.fallbacks,
+                "errors": current.errors + record.errors,
+                "input_tokens": current.input_tokens + record.input_tokens,
+                "output_tokens": current.output_tokens + record.output_tokens,
+                "latency_ms_total": current.latency_ms_total + record.latency_ms_total,
+                "latency_ms_max": max(current.latency_ms_max, record.latency_ms_max),
+            })
+
+        items = sorted(merged.values(), key=lambda r: (r.hour, r.user_id, r.client, r.model), reverse=True)
+        requests = sum(r.requests for r in items)
+        totals = UsageTotals(
+            requests=requests,
+            fallbacks=sum(r.fallbacks for r in items),
+            errors=sum(r.errors for r in items),
+            input_tokens=sum(r.input_tokens for r in items),
+            output_tokens=sum(r.output_tokens for r in items),
+            avg_latency_ms=round(sum(r.latency_ms_total for r in items) / requests, 1) if requests else 0.0,
+            max_latency_ms=max((r.latency_ms_max for r in items), default=0),
+        )
+        return UsageReport(desde=since, hasta=until, items=items, totals=totals)
+
+
+class BulkAccountService:
+    """Alta masiva de cuentas (p. ej. todos los alumnos al inicio del semestre).
+
+    Usa la clave de service role: los emails existentes se consultan con una sola llamada
+    RPC y las altas (`auth.admin.create_user`) se hacen en paralelo con concurrencia
+    acotada. Si Supabase responde con límite de frecuencia, todas las altas se pausan
+    (backoff exponencial compartido) y la fila se reintenta.
+    """
+
+    MIN_PASSWORD_LENGTH = 6
+
+    def __init__(self, concurrency: int = 8, max_retries: int = 4, base_backoff: float = 1.0):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+
+    @staticmethod
+    def parse_rows(body: bytes, content_type: str) -> List[Any]:
+        """Convierte el cuerpo (CSV con cabecera email,password o JSON) en filas.
+
+        Acepta JSON como lista de objetos o como {"accounts": [...]}. Lanza ValueError si el
+        formato no es válido; la validación de cada fila se hace después, por fila.
+        """
+        text = body.decode("utf-8-sig")
+        if "csv" in content_type:
+            reader = csv.DictReader(io.StringIO(text))
+            fields = {(f or "").strip().lower() for f in reader.fieldnames or []}
+            if not {"email", "password"} <= fields:
+                raise ValueError("El CSV debe tener cabecera con las columnas email y password")
+            return [{(k or "").strip().lower(): v for k, v in row.items()} for row in reader]
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            raise ValueError("JSON inválido")
+        if isinstance(data, dict):
+            data = data.get("accounts")
+        if not isinstance(data, list):
+            raise ValueError("Se esperaba una lista de cuentas")
+        return data
+
+    def _validate(self, raw: Any) -> Optional[LoginRequest]:
+        if not isinstance(raw, dict):
+            return None
+        try:
+            account = LoginRequest.model_validate(raw)
+        except ValidationError:
+            return None
+        email = account.email.strip().lower()
+        if "@" not in email or len(account.password) < self.MIN_PASSWORD_LENGTH:
+            return None
+        return LoginRequest(email=email, password=account.password)
+
+    async def provision(self, rows: List[Any]) -> AsyncIterator[BulkAccountResult]:
+        """Procesa las filas y va entregando el resultado de cada una en cuanto se conoce."""
+        # Un solo cliente sin sesión para todo el lote
+        auth_repository = SupabaseAdminAuthRepository()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending: List[Tuple[int, LoginRequest]] = []
+        seen = set()
+
+        for row, raw in enumerate(rows, start=1):
+            account = self._validate(raw)
+            if account is None:
+                email = str(raw.get("email") or "") if isinstance(raw, dict) else ""
+                yield BulkAccountResult(
+                    row=row, email=email, status="invalid",
+                    detail=f"Se requiere un email válido y una contraseña de al menos {self.MIN_PASSWORD_LENGTH} caracteres",
+                )
+            elif account.email in seen:
+                yield BulkAccountResult(row=row, email=account.email, status="duplicate", detail="Email repetido en la entrada")
+            else:
+                seen.add(account.email)
+                pending.append((row, account))
+
+        existing = await self._find_existing(auth_repository, [a.email for _, a in pending], semaphore)
+        to_create = []
+        for row, account in pending:
+            if account.email in existing:
+                yield BulkAccountResult(row=row, email=account.email, status="exists", user_id=existing[account.email])
+            else:
+                to_create.append((row, account))
+
+        resume_at = [0.0]  # pausa compartida por todas las altas tras un límite de frecuencia
+        tasks = [
+            asyncio.create_task(self._sign_up(auth_repository, row, account, semaphore, resume_at))
+            for row, account in to_create
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Si el cliente se desconecta no se lanzan más altas
+            for task in tasks:
+                task.cancel()
+
+    async def _find_existing(
+        self, auth_repository: SupabaseAdminAuthRepository, emails: List[str], semaphore: asyncio.Semaphore
+    ) -> Dict[str, str]:
+        try:
+            return await asyncio.to_thread(auth_repository.find_ids_by_emails, emails)
+        except Exception as e:
+            # Sin la función por lotes en la base de datos se consulta email por email
+            logger.warning("Consulta por lotes de emails falló (%s); consultando uno por uno", e)
+
+        async def _one(email: str) -> Optional[User]:
+            async with semaphore:
+                return await asyncio.to_thread(auth_repository.find_by_email, email)
+
+        users = await asyncio.gather(*(_one(e) for e in emails))
+        return {u.email: u.id for u in users if u is not None}
+
+    async def _sign_up(
+        self,
+        auth_repository: SupabaseAdminAuthRepository,
+        row: int,
+        account: LoginRequest,
+        semaphore: asyncio.Semaphore,
+        resume_at: List[float],
+    ) -> BulkAccountResult:
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                delay = resume_at[0] - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    created = await asyncio.to_thread(auth_repository.create_account, account.email, account.password)
+                except AuthRateLimitedError:
+                    backoff = self.base_backoff * 2 ** attempt
+                    resume_at[0] = max(resume_at[0], time.monotonic() + backoff)
+                    logger.warning("Límite de frecuencia en alta masiva; pausando %.1fs", backoff)
+                    continue
+                except UserAlreadyExistsError:
+                    return BulkAccountResult(row=row, email=account.email, status="exists")
+                except Exception as e:
+                    logger.warning("Alta de la fila %d falló: %s", row, e)
+                    return BulkAccountResult(row=row, email=account.email, status="error", detail="Error al crear la cuenta")
+            if created is None:
+                return BulkAccountResult(row=row, email=account.email, status="error", detail="El proveedor no devolvió el usuario")
+            return BulkAccountResult(row=row, email=account.email, status="created", user_id=created.id)
+        return BulkAccountResult(
+            row=row, email=account.email, status="error", detail="Límite de frecuencia de Supabase excedido"
+        )
 
 
 class AuthService:
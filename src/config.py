@@ -4,9 +4,36 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Settings:
+    """Configuración de infraestructura (credenciales, almacenes, rutas); se lee al arrancar.
+
+    Los parámetros de rendimiento ajustables en caliente están en `src/runtime_config.py`.
+    """
     supabase_url: str = os.getenv("SUPABASE_URL")
     supabase_key: str = os.getenv("SUPABASE_KEY")
+    # Solo en el servidor: acceso a las tablas internas protegidas con RLS (nunca al frontend)
+    supabase_service_role_key: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
     gemini_api_key: str = os.getenv("GEMINI_API_KEY")
+    # Emails con acceso a los endpoints /admin (separados por comas)
+    admin_emails: frozenset = frozenset(
+        e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()
+    )
+    # Configuración en caliente: archivo JSON vigilado y log de auditoría (JSON lines)
+    runtime_config_file: str = os.getenv("RUNTIME_CONFIG_FILE", "")
+    runtime_config_audit_log: str = os.getenv("RUNTIME_CONFIG_AUDIT_LOG", "")
+    # Idempotency-Key: "memory" (por proceso) o "sqlite" (persistente, compartido entre workers)
+    idempotency_store: str = os.getenv("IDEMPOTENCY_STORE", "memory")
+    idempotency_sqlite_path: str = os.getenv("IDEMPOTENCY_SQLITE_PATH", "idempotency.sqlite3")
+    # Historial de reportes: "supabase" (tabla report_history) o "sqlite" (sustituto local)
+    report_history_store: str = os.getenv("REPORT_HISTORY_STORE", "supabase")
+    report_history_sqlite_path: str = os.getenv("REPORT_HISTORY_SQLITE_PATH", "report_history.sqlite3")
+    # Resúmenes por periodo para reportes incrementales: "memory" o "sqlite"
+    period_summary_store: str = os.getenv("PERIOD_SUMMARY_STORE", "sqlite")
+    period_summary_sqlite_path: str = os.getenv("PERIOD_SUMMARY_SQLITE_PATH", "period_summaries.sqlite3")
+    # Registro de uso del modelo: "supabase" (tabla usage_ledger) o "sqlite" (sustituto local)
+    usage_store: str = os.getenv("USAGE_STORE", "supabase")
+    usage_sqlite_path: str = os.getenv("USAGE_SQLITE_PATH", "usage.sqlite3")
+    # Renderizado DOCX/PDF: plantilla oficial (.docx con marcadores {{campo}}) y pool de procesos
+    report_template_docx: str = os.getenv("REPORT_TEMPLATE_DOCX", "")
+    render_workers: int = int(os.getenv("RENDER_WORKERS", "2"))
 
 settings = Settings()
-
@@ -18,3 +18,23 @@ class EmailNotConfirmedError(DomainError):
     """Lanzado cuando el email del usuario no ha sido confirmado en el proveedor de auth."""
     def __init__(self):
         super().__init__("El email del usuario no ha sido confirmado.")
+
+class IdempotencyKeyReuseError(DomainError):
+    """Lanzado cuando se reutiliza un Idempotency-Key con un cuerpo de petición distinto."""
+    def __init__(self):
+        super().__init__("El Idempotency-Key ya se usó con una petición diferente.")
+
+class IdempotencyRequestInProgressError(DomainError):
+    """Lanzado cuando la petición original con el mismo Idempotency-Key sigue en curso demasiado tiempo."""
+    def __init__(self):
+        super().__init__("Ya hay una petición en curso con este Idempotency-Key.")
+
+class InvalidCursorError(DomainError):
+    """Lanzado cuando el cursor de paginación no es válido."""
+    def __init__(self):
+        super().__init__("El cursor de paginación no es válido.")
+
+class AuthRateLimitedError(DomainError):
+    """Lanzado cuando el proveedor de auth rechaza la petición por límite de frecuencia."""
+    def __init__(self):
+        super().__init__("El proveedor de autenticación limitó la frecuencia de peticiones.")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List, Optional
 
 
 class Token(BaseModel):
@@ -35,6 +35,10 @@ class ReportResponse(BaseModel):
     Respuesta con el reporte generado.
     """
     report: str = Field(..., description="Reporte generado")
+    degraded: bool = Field(
+        False,
+        description="True si el reporte lo produjo el generador local (sobrecarga o fallo de la IA)",
+    )
 
 class AuthTokenResponse(BaseModel):
     """
@@ -49,3 +53,133 @@ class AuthTokenResponse(BaseModel):
 class RefreshRequest(BaseModel):
     """Petición para refrescar tokens a partir de refresh_token"""
     refresh_token: str = Field(..., description="Refresh token proporcionado por Supabase")
+
+
+class IdempotencyRecord(BaseModel):
+    """Respuesta almacenada (o en curso) para una clave Idempotency-Key de un usuario."""
+    user_id: str = Field(..., description="Usuario dueño de la clave")
+    key: str = Field(..., description="Valor del header Idempotency-Key")
+    fingerprint: str = Field(..., description="Huella del cuerpo de la petición original")
+    completed: bool = Field(False, description="False mientras la petición original sigue en curso")
+    response: Optional[Dict[str, Any]] = Field(None, description="Respuesta serializada de la petición original")
+    expires_at: float = Field(..., description="Instante (epoch, segundos) en que caduca el registro")
+
+
+class ReportHistoryEntry(BaseModel):
+    """Reporte generado y guardado en el historial de un usuario."""
+    id: str = Field(..., description="Identificador único del reporte")
+    user_id: str = Field(..., description="Usuario que generó el reporte")
+    actividades: List[str] = Field(..., description="Actividades usadas para generarlo")
+    report: str = Field(..., description="Reporte generado")
+    degraded: bool = Field(False, description="True si lo produjo el generador local")
+    created_at: str = Field(..., description="Fecha de creación (ISO 8601, UTC)")
+
+
+class ReportHistoryPage(BaseModel):
+    """Página del historial, ordenada del más reciente al más antiguo."""
+    items: List[ReportHistoryEntry] = Field(default_factory=list, description="Reportes de la página")
+    next_cursor: Optional[str] = Field(None, description="Cursor para pedir la página siguiente (None si no hay más)")
+
+
+class PeriodReportRequest(BaseModel):
+    """
+    Solicitud de reporte de un periodo (día, mes, semestre...) compuesto por subperiodos.
+
+    Los resúmenes de cada subperiodo se guardan por usuario y `periodo`, y se reutilizan
+    mientras sus actividades no cambien.
+    """
+    periodo: str = Field(..., description="Identificador único del periodo para el usuario (p. ej. 2026-10, 2026-10-19)")
+    actividades: List[str] = Field(default_factory=list, description="Actividades nuevas de este periodo")
+    subperiodos: List["PeriodReportRequest"] = Field(default_factory=list, description="Subperiodos que lo componen")
+
+    def has_activities(self) -> bool:
+        return any(a.strip() for a in self.actividades) or any(s.has_activities() for s in self.subperiodos)
+
+    def periodos(self) -> List[str]:
+        return [self.periodo] + [p for s in self.subperiodos for p in s.periodos()]
+
+    @model_validator(mode="after")
+    def _periodos_unicos(self) -> "PeriodReportRequest":
+        # Los resúmenes se guardan por `periodo`: dos nodos con el mismo id se pisarían
+        seen = set()
+        for periodo in self.periodos():
+            if periodo in seen:
+                raise ValueError(f"Periodo repetido: {periodo}")
+            seen.add(periodo)
+        return self
+
+
+class PeriodReportResponse(ReportResponse):
+    """
+    Reporte de un periodo, con estadísticas de reutilización de resúmenes.
+    """
+    resumenes_reutilizados: int = Field(0, description="Resúmenes de subperiodos tomados de la caché")
+    resumenes_generados: int = Field(0, description="Resúmenes generados en esta petición")
+
+
+class PeriodSummary(BaseModel):
+    """Resumen guardado de un periodo de un usuario."""
+    user_id: str = Field(..., description="Usuario dueño del resumen")
+    periodo: str = Field(..., description="Identificador del periodo")
+    fingerprint: str = Field(..., description="Huella de las actividades y subperiodos resumidos")
+    summary: str = Field(..., description="Texto del resumen")
+    updated_at: str = Field(..., description="Fecha de la última generación (ISO 8601, UTC)")
+
+
+class DraftResponse(BaseModel):
+    """Estado de un borrador especulativo tras enviarlo."""
+    status: str = Field(..., description="scheduled, pending, ready o skipped")
+    reason: Optional[str] = Field(None, description="Motivo cuando status es skipped")
+
+
+class RenderRequest(BaseModel):
+    """
+    Solicitud para renderizar un reporte en la plantilla oficial.
+    Si no se envía `report`, se genera a partir de `actividades`.
+    """
+    report: Optional[str] = Field(None, description="Texto del reporte ya generado")
+    actividades: Optional[List[str]] = Field(None, description="Actividades para generar el reporte")
+    campos: Dict[str, str] = Field(default_factory=dict, description="Campos extra de la plantilla (nombre, periodo, ...)")
+
+
+class BulkAccountResult(BaseModel):
+    """Resultado de una fila del alta masiva de cuentas."""
+    row: int = Field(..., description="Número de fila en la entrada (desde 1)")
+    email: str = Field(..., description="Email de la fila")
+    status: str = Field(..., description="created, exists, duplicate, invalid o error")
+    user_id: Optional[str] = Field(None, description="Identificador del usuario creado o existente")
+    detail: Optional[str] = Field(None, description="Motivo cuando la fila no se creó")
+
+
+class UsageRecord(BaseModel):
+    """Uso del modelo agregado por usuario, cliente, hora y modelo."""
+    user_id: str = Field(..., description="Usuario al que se atribuye el uso")
+    client: str = Field(..., description="Sistema que hizo las peticiones (header X-Client-Id)")
+    hour: str = Field(..., description="Inicio de la hora (ISO 8601, UTC)")
+    model: str = Field(..., description="Modelo usado, o `local` sin clave de IA")
+    requests: int = Field(0, description="Reportes generados")
+    fallbacks: int = Field(0, description="Reportes resueltos con el generador local")
+    errors: int = Field(0, description="Reportes que terminaron en error")
+    input_tokens: int = Field(0, description="Tokens de entrada informados por el modelo")
+    output_tokens: int = Field(0, description="Tokens de salida informados por el modelo")
+    latency_ms_total: int = Field(0, description="Suma de latencias (ms)")
+    latency_ms_max: int = Field(0, description="Latencia máxima (ms)")
+
+
+class UsageTotals(BaseModel):
+    """Totales de un rango de uso."""
+    requests: int = 0
+    fallbacks: int = 0
+    errors: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    avg_latency_ms: float = 0.0
+    max_latency_ms: int = 0
+
+
+class UsageReport(BaseModel):
+    """Uso por hora en un rango, del más reciente al más antiguo, con sus totales."""
+    desde: str = Field(..., description="Inicio del rango (ISO 8601, UTC)")
+    hasta: str = Field(..., description="Fin del rango, exclusivo (ISO 8601, UTC)")
+    items: List[UsageRecord] = Field(default_factory=list, description="Uso por usuario, cliente, hora y modelo")
+    totals: UsageTotals = Field(default_factory=UsageTotals, description="Totales del rango")
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Optional
-from .models import User
+from typing import Any, Dict, List, Optional, Tuple
+from .models import IdempotencyRecord, PeriodSummary, ReportHistoryEntry, UsageRecord, User
 
 class AuthRepository(ABC):
     @abstractmethod
@@ -11,3 +11,73 @@ class AuthRepository(ABC):
     def sign_in_with_password(self, email: str, password: str) -> str:
         pass
 
+
+class IdempotencyRepository(ABC):
+    @abstractmethod
+    def begin(self, user_id: str, key: str, fingerprint: str, ttl: float) -> Optional[IdempotencyRecord]:
+        """Reserva la clave de forma atómica.
+
+        Devuelve None si la reserva se hizo (la petición actual es la original) o el
+        registro existente si otra petición ya la reservó.
+        """
+        pass
+
+    @abstractmethod
+    def get(self, user_id: str, key: str) -> Optional[IdempotencyRecord]:
+        pass
+
+    @abstractmethod
+    def complete(self, user_id: str, key: str, response: Dict[str, Any], ttl: float) -> None:
+        pass
+
+    @abstractmethod
+    def renew(self, user_id: str, key: str, ttl: float) -> None:
+        """Extiende una reserva en curso mientras la petición original sigue ejecutándose."""
+        pass
+
+    @abstractmethod
+    def release(self, user_id: str, key: str) -> None:
+        """Libera una reserva en curso (la petición original falló) para permitir reintentos."""
+        pass
+
+
+class ReportHistoryRepository(ABC):
+    @abstractmethod
+    def insert_many(self, entries: List[ReportHistoryEntry]) -> None:
+        pass
+
+    @abstractmethod
+    def list_by_user(
+        self, user_id: str, limit: int, before: Optional[Tuple[str, str]] = None
+    ) -> List[ReportHistoryEntry]:
+        """Devuelve hasta `limit` reportes del usuario ordenados por (created_at, id) descendente.
+
+        `before` es el par (created_at, id) del último elemento de la página anterior.
+        """
+        pass
+
+
+class PeriodSummaryRepository(ABC):
+    @abstractmethod
+    def get_many(self, user_id: str, periodos: List[str]) -> Dict[str, PeriodSummary]:
+        """Devuelve los resúmenes existentes de esos periodos, indexados por periodo."""
+        pass
+
+    @abstractmethod
+    def save_many(self, summaries: List[PeriodSummary]) -> None:
+        """Inserta o reemplaza resúmenes (por usuario y periodo)."""
+        pass
+
+
+class UsageRepository(ABC):
+    @abstractmethod
+    def add_many(self, records: List[UsageRecord]) -> None:
+        """Suma los contadores a las filas existentes (mismo usuario, cliente, hora y modelo)
+        o las crea si no existen.
+        """
+        pass
+
+    @abstractmethod
+    def list_usage(self, user_id: Optional[str], since: str, until: str) -> List[UsageRecord]:
+        """Filas con `since <= hour < until`; de todos los usuarios si `user_id` es None."""
+        pass
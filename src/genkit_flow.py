@@ -4,7 +4,7 @@ import json
 import re
 import asyncio
 import time
-from typing import List
+from typing import List, Optional
 import unicodedata
 
 from dotenv import load_dotenv
@@ -12,26 +12,57 @@ from genkit.ai import Genkit
 from genkit.plugins.google_genai import GoogleAI
 
 from src.domain.models import ReportRequest, ReportResponse
+from src.load_shedding import LoadShedder, OverloadedError
+from src.local_generator import generate_local_report
+from src.runtime_config import RuntimeSettings, runtime_config
+from src.usage import record_model_call, usage_ledger
 
 
-MAX_CHARS = 1245
-
 load_dotenv()  # carga GEMINI_API_KEY y otras del .env
 
 logger = logging.getLogger(__name__)
 
 # Inicializa Genkit pasando explícitamente la API Key (si existe)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_MODEL = os.getenv("GEMINI_MODEL", "googleai/gemini-2.5-flash")
 if GEMINI_API_KEY:
     ai = Genkit(
         plugins=[GoogleAI(api_key=GEMINI_API_KEY)],
-        model=GEMINI_MODEL
+        model=runtime_config.current.gemini_model
     )
 else:
     ai = None
     logger.warning("GEMINI_API_KEY no encontrada: se usará generador local de fallback para pruebas")
 
+# Controlador de carga: limita llamadas concurrentes al modelo y degrada al generador
+# local cuando la cola, la espera o la latencia reciente superan los umbrales.
+# Los umbrales se actualizan en caliente con cada cambio de runtime_config.
+load_shedder = LoadShedder()
+
+
+def _configure_load_shedder(cfg: RuntimeSettings) -> None:
+    load_shedder.configure(
+        max_concurrency=cfg.genai_max_concurrency,
+        max_queue_wait=cfg.genai_max_queue_wait,
+        queue_wait_threshold=cfg.genai_shed_queue_wait,
+        latency_threshold=cfg.genai_shed_latency,
+        shed_fraction=cfg.genai_shed_fraction,
+    )
+
+
+runtime_config.subscribe(_configure_load_shedder)
+
+# Modo map-reduce para listas de actividades muy largas: por encima del umbral
+# (cfg.map_reduce_threshold_tokens, tokens estimados del prompt) las actividades se resumen
+# por bloques en paralelo y luego se combinan en una llamada final que apunta a la ventana
+# de longitud de cfg.max_chars.
+MAP_MAX_LEVELS = 3
+
+# Modelo con el que se registra el uso cuando no hay clave de IA
+LOCAL_MODEL = "local"
+
+# Longitud mínima de un resumen de subperiodo, por grande que sea el número de hermanos
+MIN_SUMMARY_CHARS = 150
+
 
 def extract_report_text(noisy: str) -> str:
     """
@@ -127,153 +158,130 @@ def extract_report_text(noisy: str) -> str:
     return inner.strip()
 
 
-async def _local_generate_report(actividades: List[str]) -> str:
-    """Generador local sencillo para pruebas cuando no hay clave de AI.
+async def _local_generate_report(actividades: List[str], max_chars: int) -> str:
+    """Generador local basado en plantillas (sin clave de AI, fallos del modelo o sobrecarga).
 
-    Construye un párrafo conciso a partir de las actividades y lo acorta a MAX_CHARS.
+    Redacta en primera persona y tiempo pasado, con longitud <= max_chars.
     """
-    # Intenta combinar actividades en oraciones
-    sentences = []
-    for a in actividades:
-        text = a.strip()
-        if not text:
-            continue
-        # Asegurar que cada activity termine en punto
-        if not text.endswith('.'):
-            text = text + '.'
-        sentences.append(text)
-
-    if not sentences:
-        return ""
-
-    # Construir un párrafo: Intro + actividades combinadas
-    intro = "Reporte de actividades:"
-    paragraph = intro + " " + " ".join(sentences)
-    paragraph = ' '.join(paragraph.split())  # normalizar espacios
-
-    if len(paragraph) <= MAX_CHARS:
-        return paragraph
-
-    truncated = paragraph[:MAX_CHARS]
-    last_space = truncated.rfind(' ')
-    if last_space > 0:
-        truncated = truncated[:last_space].rstrip()
-    return truncated
+    return generate_local_report(actividades, max_chars)
 
 
-@ai.flow() if ai is not None else None
-async def generar_reporte(input_data: ReportRequest) -> ReportResponse:
-    # Timeout configurable para llamadas a la IA (segundos) — aumentado a 20s por defecto
-    timeout = int(os.getenv("GENAI_TIMEOUT", "20"))
+async def _degraded_report(actividades: List[str], error_msg: str, max_chars: int) -> ReportResponse:
+    """Genera el reporte con el generador local y lo marca como degradado."""
+    report = await _local_generate_report(actividades, max_chars)
+    if not report:
+        raise ValueError(error_msg)
+    return ReportResponse(report=report, degraded=True)
 
-    # Si no hay API key, usar generador local (igual que antes)
-    if ai is None:
-        report = await _local_generate_report(input_data.actividades)
-        if not report:
-            raise ValueError("Error al generar el reporte (fallback local)")
-        return ReportResponse(report=report)
 
-    prompt_lines = "\n".join(f"- {a}" for a in input_data.actividades)
-
-    # rango objetivo: cercano o superior a MAX_CHARS
-    min_chars = max(int(MAX_CHARS * 0.9), MAX_CHARS - 50)
-    max_target = MAX_CHARS + 300  # permitir algo por encima
-    # estimación tokens (aprox 4 chars por token)
-    max_output_tokens = max(512, int(max_target / 4))
-
-    # Prompt más conciso y directo para acelerar la respuesta
-    prompt = (
-        f"Redacta un reporte profesional en primera persona y tiempo pasado basado en estas actividades:\n"
-        f"{prompt_lines}\n\n"
-        f"Longitud: {min_chars}-{max_target} caracteres.\n"
-        f'Responde únicamente: {{"report":"tu_texto_aquí"}}'
-    )
-
-    # No usar streaming (evitar Channel/callbacks). Llamar siempre a ai.generate() con retries
-    raw_text = None
-    start_call = None
-    def _normalize_text(s: str) -> str:
-        if not isinstance(s, str):
-            try:
-                s = str(s)
-            except Exception:
-                s = ''
+def _normalize_text(s: str) -> str:
+    if not isinstance(s, str):
+        try:
+            s = str(s)
+        except Exception:
+            s = ''
+    try:
+        s = unicodedata.normalize('NFC', s)
+    except Exception:
+        pass
+    if 'Ã' in s or 'Â' in s:
         try:
-            s = unicodedata.normalize('NFC', s)
+            s = s.encode('latin-1').decode('utf-8')
         except Exception:
             pass
-        if 'Ã' in s or 'Â' in s:
-            try:
-                s = s.encode('latin-1').decode('utf-8')
-            except Exception:
-                pass
-        return s
+    return s
 
-    def fix_mojibake_and_normalize(s: str) -> str:
-        """Intentar corregir mojibake común (latin-1 interpretado como utf-8) y normalizar Unicode.
 
-        - Si detecta secuencias típicas de mojibake ('Ã', 'Â'), intenta re-decodificar desde latin-1.
-        - Siempre aplica unicodedata.normalize('NFC').
-        """
-        if not isinstance(s, str):
-            try:
-                s = str(s or '')
-            except Exception:
-                s = ''
-        # Primer intento: normalizar
+def fix_mojibake_and_normalize(s: str) -> str:
+    """Intentar corregir mojibake común (latin-1 interpretado como utf-8) y normalizar Unicode.
+
+    - Si detecta secuencias típicas de mojibake ('Ã', 'Â'), intenta re-decodificar desde latin-1.
+    - Siempre aplica unicodedata.normalize('NFC').
+    """
+    if not isinstance(s, str):
         try:
-            s = unicodedata.normalize('NFC', s)
+            s = str(s or '')
         except Exception:
-            pass
+            s = ''
+    # Primer intento: normalizar
+    try:
+        s = unicodedata.normalize('NFC', s)
+    except Exception:
+        pass
 
-        # Si hay indicios de mojibake, intentar re-decode
-        if 'Ã' in s or 'Â' in s:
+    # Si hay indicios de mojibake, intentar re-decode
+    if 'Ã' in s or 'Â' in s:
+        try:
+            s2 = s.encode('latin-1', errors='replace').decode('utf-8', errors='replace')
+            # normalizar resultado
             try:
-                s2 = s.encode('latin-1', errors='replace').decode('utf-8', errors='replace')
-                # normalizar resultado
-                try:
-                    s2 = unicodedata.normalize('NFC', s2)
-                except Exception:
-                    pass
-                s = s2
+                s2 = unicodedata.normalize('NFC', s2)
             except Exception:
-                # si falla, mantener original
                 pass
+            s = s2
+        except Exception:
+            # si falla, mantener original
+            pass
 
-        return s
+    return s
 
-    try:
-        start_call = time.perf_counter()
-        try:
-            raw = await asyncio.wait_for(ai.generate(prompt=prompt, model=GEMINI_MODEL), timeout=timeout)
-        except TypeError:
-            raw = await asyncio.wait_for(ai.generate(prompt=prompt), timeout=timeout)
-        elapsed_call = time.perf_counter() - start_call
-        logger.debug("AI generate llamada completada en %.2fs (timeout=%ss)", elapsed_call, timeout)
-    except asyncio.TimeoutError:
-        logger.warning("Primera llamada a AI timeout tras %ss, intentando reintento con timeout doble", timeout)
-        try:
-            retry_timeout = timeout * 2
+
+class _EmptyReportError(ValueError):
+    """El modelo respondió pero no se pudo extraer el campo "report"."""
+
+
+def _estimate_tokens(text: str) -> int:
+    # estimación tokens (aprox 4 chars por token)
+    return len(text) // 4 + 1
+
+
+def _length_window(max_chars: int):
+    """Rango objetivo (min, max) de caracteres: cercano o superior a max_chars."""
+    min_chars = max(int(max_chars * 0.9), max_chars - 50)
+    max_target = max_chars + 300  # permitir algo por encima
+    return min_chars, max_target
+
+
+def _build_prompt(instruction: str, items: List[str], min_chars: int, max_target: int) -> str:
+    prompt_lines = "\n".join(f"- {a}" for a in items)
+    # Prompt conciso y directo para acelerar la respuesta
+    return (
+        f"{instruction}:\n"
+        f"{prompt_lines}\n\n"
+        f"Longitud: {min_chars}-{max_target} caracteres.\n"
+        f'Responde únicamente: {{"report":"tu_texto_aquí"}}'
+    )
+
+
+async def _call_model(prompt: str, cfg: RuntimeSettings):
+    """Llama a ai.generate() con un cupo del controlador de carga y un reintento con timeout doble.
+
+    No usa streaming (evitar Channel/callbacks). Propaga la excepción si ambos intentos
+    fallan; OverloadedError si no hubo cupo a tiempo.
+    """
+    # Timeout configurable para llamadas a la IA (segundos) — 20s por defecto
+    timeout = cfg.genai_timeout
+
+    async def _attempt(attempt_timeout: float):
+        async with load_shedder.slot():
             start_call = time.perf_counter()
             try:
-                raw = await asyncio.wait_for(ai.generate(prompt=prompt, model=GEMINI_MODEL), timeout=retry_timeout)
+                raw = await asyncio.wait_for(ai.generate(prompt=prompt, model=cfg.gemini_model), timeout=attempt_timeout)
             except TypeError:
-                raw = await asyncio.wait_for(ai.generate(prompt=prompt), timeout=retry_timeout)
-            elapsed_call = time.perf_counter() - start_call
-            logger.debug("Reintento AI completado en %.2fs (timeout=%ss)", elapsed_call, retry_timeout)
-        except Exception as retry_exc:
-            logger.error("Reintento a la IA falló: %s. Usando generador local de fallback.", retry_exc)
-            report = await _local_generate_report(input_data.actividades)
-            if not report:
-                raise ValueError("Error al generar el reporte (fallback local falló)")
-            return ReportResponse(report=report)
-    except Exception as e:
-        logger.warning("Llamada a IA falló: %s. Intentando fallback local.", e)
-        report = await _local_generate_report(input_data.actividades)
-        if not report:
-            raise ValueError("Error al generar el reporte (fallback local falló)")
-        return ReportResponse(report=report)
+                raw = await asyncio.wait_for(ai.generate(prompt=prompt), timeout=attempt_timeout)
+        record_model_call(raw)
+        logger.debug("AI generate llamada completada en %.2fs (timeout=%ss)", time.perf_counter() - start_call, attempt_timeout)
+        return raw
 
+    try:
+        return await _attempt(timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Primera llamada a AI timeout tras %ss, intentando reintento con timeout doble", timeout)
+        return await _attempt(timeout * 2)
+
+
+def _parse_report_text(raw) -> Optional[str]:
+    """Extrae el campo "report" de la respuesta del modelo y corrige mojibake/acentos."""
     # Extraer texto del objeto raw
     if hasattr(raw, 'response') and isinstance(raw.response, str):
         raw_text = _normalize_text(raw.response)
@@ -289,9 +297,7 @@ async def generar_reporte(input_data: ReportRequest) -> ReportResponse:
         candidate = m.group(1)
         try:
             # des-escape JSON string
-            candidate_unescaped = candidate.encode('utf-8').decode('unicode_escape')
-            parsed = {"report": candidate_unescaped}
-            report_text = parsed["report"].strip()
+            report_text = candidate.encode('utf-8').decode('unicode_escape').strip()
         except Exception:
             report_text = candidate.strip()
     else:
@@ -304,34 +310,24 @@ async def generar_reporte(input_data: ReportRequest) -> ReportResponse:
             report_text = raw_text.strip()
 
     if not report_text:
-        logger.error("No se pudo extraer report del resultado AI")
-        raise ValueError("Error al generar el reporte")
+        return None
 
     # Aplicar corrección de mojibake / normalización de acentos antes de devolver
     try:
         report_text = fix_mojibake_and_normalize(report_text)
     except Exception:
         logger.debug("No se pudo aplicar fix_mojibake_and_normalize; devolviendo texto sin cambios")
+    return report_text
 
-    # Calcular tiempo total solo si start_call fue inicializado
-    if start_call is not None:
-        try:
-            total_elapsed = time.perf_counter() - start_call
-            logger.debug("Tiempo total generación (desde llamada AI): %.2fs", total_elapsed)
-        except Exception:
-            pass
 
-    # Si es más corto que el mínimo objetivo, advertir pero devolver (evitar reintentos costosos)
-    if len(report_text) < min_chars:
-        logger.warning("Reporte generado corto (%d chars) menor que mínimo %d", len(report_text), min_chars)
-
-    # truncado limpio como antes
-    if len(report_text) <= MAX_CHARS:
-        return ReportResponse(report=report_text)
-    truncated = report_text[:MAX_CHARS]
+def _fit_to_max_chars(report_text: str, max_chars: int) -> str:
+    """Truncado limpio: corta en el último punto cercano al límite o, si no, en el último espacio."""
+    if len(report_text) <= max_chars:
+        return report_text
+    truncated = report_text[:max_chars]
     last_period = truncated.rfind('.')
     last_space = truncated.rfind(' ')
-    if last_period > int(MAX_CHARS * 0.9):
+    if last_period > int(max_chars * 0.9):
         truncated = truncated[:last_period + 1]
     elif last_space > 0:
         truncated = truncated[:last_space].rstrip()
@@ -340,4 +336,205 @@ async def generar_reporte(input_data: ReportRequest) -> ReportResponse:
         truncated = fix_mojibake_and_normalize(truncated)
     except Exception:
         pass
-    return ReportResponse(report=truncated)
+    return truncated
+
+
+async def _generate_text(instruction: str, items: List[str], max_chars: int, cfg: RuntimeSettings) -> str:
+    """Una llamada al modelo sobre `items`; devuelve el texto ya recortado a max_chars."""
+    min_chars, max_target = _length_window(max_chars)
+    start_call = time.perf_counter()
+    raw = await _call_model(_build_prompt(instruction, items, min_chars, max_target), cfg)
+    report_text = _parse_report_text(raw)
+    if not report_text:
+        logger.error("No se pudo extraer report del resultado AI")
+        raise _EmptyReportError("Error al generar el reporte")
+    logger.debug("Tiempo total generación (desde llamada AI): %.2fs", time.perf_counter() - start_call)
+
+    # Si es más corto que el mínimo objetivo, advertir pero devolver (evitar reintentos costosos)
+    if len(report_text) < min_chars:
+        logger.warning("Reporte generado corto (%d chars) menor que mínimo %d", len(report_text), min_chars)
+    return _fit_to_max_chars(report_text, max_chars)
+
+
+_REPORT_INSTRUCTION = "Redacta un reporte profesional en primera persona y tiempo pasado basado en estas actividades"
+_MAP_INSTRUCTION = (
+    "Resume en primera persona y tiempo pasado este bloque de actividades, conservando "
+    "los logros y resultados concretos"
+)
+_REDUCE_INSTRUCTION = (
+    "Redacta un reporte profesional en primera persona y tiempo pasado que integre de forma "
+    "coherente estos resúmenes parciales de actividades, sin repetir información"
+)
+_COMPOSE_INSTRUCTION = (
+    "Redacta un reporte profesional en primera persona y tiempo pasado del periodo completo, "
+    "integrando los resúmenes de sus subperiodos y las actividades nuevas, sin repetir información"
+)
+
+
+def _chunk_by_tokens(items: List[str], max_tokens: int) -> List[List[str]]:
+    """Agrupa items consecutivos en bloques cuya estimación de tokens no supera max_tokens."""
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for item in items:
+        item_tokens = _estimate_tokens(item) + 2  # viñeta y salto de línea
+        if current and current_tokens + item_tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += item_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _needs_map_reduce(actividades: List[str], cfg: RuntimeSettings) -> bool:
+    return sum(_estimate_tokens(a) + 2 for a in actividades) > cfg.map_reduce_threshold_tokens
+
+
+async def _generar_single(actividades: List[str], cfg: RuntimeSettings) -> ReportResponse:
+    """Generación en una sola llamada; ante fallo del modelo usa el generador local."""
+    try:
+        report = await _generate_text(_REPORT_INSTRUCTION, actividades, cfg.max_chars, cfg)
+    except _EmptyReportError:
+        raise
+    except OverloadedError:
+        logger.warning("Sin cupo para llamar a la IA tras %ss en cola. Usando generador local.", load_shedder.max_queue_wait)
+        return await _degraded_report(actividades, "Error al generar el reporte (fallback local falló)", cfg.max_chars)
+    except Exception as e:
+        logger.warning("Llamada a IA falló: %s. Intentando fallback local.", e)
+        return await _degraded_report(actividades, "Error al generar el reporte (fallback local falló)", cfg.max_chars)
+    return ReportResponse(report=report)
+
+
+async def _map_chunks(items: List[str], degraded: List[bool], cfg: RuntimeSettings) -> List[str]:
+    """Resume bloques de items en paralelo, con concurrencia acotada por petición."""
+    chunks = _chunk_by_tokens(items, cfg.map_chunk_tokens)
+    # Cada resumen parcial recibe una parte del doble de max_chars, para que el reduce
+    # tenga material suficiente sin volver a crecer sin límite
+    chunk_chars = max(300, (2 * cfg.max_chars) // len(chunks))
+    semaphore = asyncio.Semaphore(cfg.map_concurrency)
+
+    async def _summarize(chunk: List[str]) -> str:
+        async with semaphore:
+            try:
+                return await _generate_text(_MAP_INSTRUCTION, chunk, chunk_chars, cfg)
+            except Exception as e:
+                logger.warning("Resumen parcial falló (%d actividades): %s. Usando generador local.", len(chunk), e)
+                degraded[0] = True
+                return generate_local_report(chunk, chunk_chars)
+
+    summaries = await asyncio.gather(*(_summarize(c) for c in chunks))
+    return [s for s in summaries if s]
+
+
+async def _generar_map_reduce(actividades: List[str], cfg: RuntimeSettings) -> ReportResponse:
+    """Map-reduce: resúmenes parciales por bloques en paralelo y una llamada final de combinación.
+
+    Si los resúmenes parciales aún superan el umbral, se vuelven a resumir (árbol, hasta
+    MAP_MAX_LEVELS niveles) antes del reduce final.
+    """
+    degraded = [False]
+    items = [a for a in actividades if a.strip()]
+    level = 0
+    while level == 0 or (_needs_map_reduce(items, cfg) and level < MAP_MAX_LEVELS):
+        items = await _map_chunks(items, degraded, cfg)
+        level += 1
+        logger.debug("Map-reduce nivel %d: %d resúmenes parciales", level, len(items))
+        if not items:
+            return await _degraded_report(actividades, "Error al generar el reporte (fallback local falló)", cfg.max_chars)
+
+    try:
+        report = await _generate_text(_REDUCE_INSTRUCTION, items, cfg.max_chars, cfg)
+    except _EmptyReportError:
+        raise
+    except Exception as e:
+        logger.warning("Reduce final falló: %s. Usando generador local.", e)
+        return await _degraded_report(actividades, "Error al generar el reporte (fallback local falló)", cfg.max_chars)
+    return ReportResponse(report=report, degraded=degraded[0])
+
+
+@ai.flow() if ai is not None else (lambda fn: fn)
+async def generar_reporte(input_data: ReportRequest) -> ReportResponse:
+    # Una sola instantánea de configuración para toda la petición
+    cfg = runtime_config.current
+    # Tokens, latencia y fallback quedan en el registro de uso del usuario de la petición
+    async with usage_ledger.measure(cfg.gemini_model if ai is not None else LOCAL_MODEL) as sample:
+        result = await _generar(input_data, cfg)
+        sample.fallback = result.degraded
+    return result
+
+
+async def _generar(input_data: ReportRequest, cfg: RuntimeSettings) -> ReportResponse:
+    # Si no hay API key, usar generador local (igual que antes)
+    if ai is None:
+        return await _degraded_report(input_data.actividades, "Error al generar el reporte (fallback local)", cfg.max_chars)
+
+    # Bajo sobrecarga, responder de inmediato con el generador local en vez de encolar
+    if load_shedder.should_shed():
+        return await _degraded_report(input_data.actividades, "Error al generar el reporte (fallback local falló)", cfg.max_chars)
+
+    if _needs_map_reduce(input_data.actividades, cfg):
+        return await _generar_map_reduce(input_data.actividades, cfg)
+    return await _generar_single(input_data.actividades, cfg)
+
+
+def child_summary_chars(fan_out: int, cfg: Optional[RuntimeSettings] = None) -> int:
+    """Longitud de cada resumen de subperiodo al componer `fan_out` hermanos.
+
+    Los resúmenes ocupan como mucho la mitad del umbral de map-reduce (el resto queda para
+    las actividades nuevas), así el prompt de composición tiene un tamaño casi constante
+    en vez de crecer con el número de subperiodos.
+    """
+    cfg = cfg or runtime_config.current
+    budget = cfg.map_reduce_threshold_tokens * 4 // 2  # ~4 caracteres por token
+    return max(MIN_SUMMARY_CHARS, min(cfg.max_chars, budget // max(fan_out, 1)))
+
+
+async def componer_reporte(
+    resumenes: List[str], actividades: List[str], max_chars: Optional[int] = None
+) -> ReportResponse:
+    """Reporte de un periodo a partir de los resúmenes ya generados de sus subperiodos
+    más las actividades nuevas, sin reenviar las actividades originales de los subperiodos.
+
+    `max_chars` permite generar resúmenes compactos de subperiodos (ver `child_summary_chars`);
+    por defecto es el MAX_CHARS vigente.
+    """
+    cfg = runtime_config.current
+    if max_chars is not None:
+        cfg = cfg.model_copy(update={"max_chars": max_chars})
+    async with usage_ledger.measure(cfg.gemini_model if ai is not None else LOCAL_MODEL) as sample:
+        result = await _componer(resumenes, actividades, cfg)
+        sample.fallback = result.degraded
+    return result
+
+
+async def _componer(resumenes: List[str], actividades: List[str], cfg: RuntimeSettings) -> ReportResponse:
+    resumenes = [r for r in resumenes if r.strip()]
+    if resumenes:
+        # Acota cada resumen (p. ej. los guardados antes a longitud completa)
+        per_summary = child_summary_chars(len(resumenes), cfg)
+        resumenes = [_fit_to_max_chars(r, per_summary) for r in resumenes]
+    items = resumenes + [a for a in actividades if a.strip()]
+
+    def _local() -> ReportResponse:
+        nuevas = generate_local_report(actividades, cfg.max_chars) if actividades else ""
+        report = _fit_to_max_chars(" ".join(r for r in [*resumenes, nuevas] if r), cfg.max_chars)
+        if not report:
+            raise ValueError("Error al generar el reporte (fallback local falló)")
+        return ReportResponse(report=report, degraded=True)
+
+    if ai is None or load_shedder.should_shed():
+        return _local()
+
+    if _needs_map_reduce(items, cfg):
+        return await _generar_map_reduce(items, cfg)
+    try:
+        instruction = _COMPOSE_INSTRUCTION if resumenes else _REPORT_INSTRUCTION
+        report = await _generate_text(instruction, items, cfg.max_chars, cfg)
+    except _EmptyReportError:
+        raise
+    except Exception as e:
+        logger.warning("Composición del periodo falló: %s. Usando generador local.", e)
+        return _local()
+    return ReportResponse(report=report)
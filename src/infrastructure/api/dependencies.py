@@ -1,19 +1,38 @@
 from typing import Optional
 
-from fastapi import HTTPException, Depends
+from fastapi import HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from .repositories.supabase_auth_repository import SupabaseAuthRepository
+from ...config import settings
 from ...domain.models import User
+from ... import usage
 
 auth_repository = SupabaseAuthRepository()
 security = HTTPBearer(auto_error=False)
 
-async def jwt_scheme(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> User:
+async def authenticate_token(token: Optional[str]) -> Optional[User]:
+    """Valida un access token y devuelve el User, o None si falta o no es válido."""
+    if not token:
+        return None
+    return auth_repository.get_user_from_token(token)
+
+
+def is_admin(user: User) -> bool:
+    return user.email.lower() in settings.admin_emails
+
+
+async def jwt_scheme(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+) -> User:
     """Acepta token desde Authorization: Bearer <token> (solo header).
 
     Nota: ya no se aceptan cookies. El frontend debe enviar el token en el header
     Authorization: Bearer <token>.
+
+    Además atribuye el uso del modelo de la petición al usuario y al sistema cliente
+    (header opcional `X-Client-Id`).
     """
     token = None
     if credentials and credentials.credentials:
@@ -22,8 +41,16 @@ async def jwt_scheme(credentials: Optional[HTTPAuthorizationCredentials] = Depen
     if not token:
         raise HTTPException(status_code=401, detail="No autenticado")
 
-    user = auth_repository.get_user_from_token(token)
+    user = await authenticate_token(token)
     if not user:
         raise HTTPException(status_code=401, detail="Token inválido")
 
-    return user
\ No newline at end of file
+    usage.bind(user.id, request.headers.get("x-client-id"))
+    return user
+
+
+async def admin_scheme(user: User = Depends(jwt_scheme)) -> User:
+    """Como `jwt_scheme`, pero además exige que el email del usuario esté en ADMIN_EMAILS."""
+    if not is_admin(user):
+        raise HTTPException(status_code=403, detail="Se requieren permisos de administrador")
+    return user
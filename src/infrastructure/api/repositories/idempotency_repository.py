@@ -0,0 +1,180 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from src.config import settings
+from src.domain.models import IdempotencyRecord
+from src.domain.repositories import IdempotencyRepository
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántas reservas se purgan los registros caducados
+_PURGE_EVERY = 200
+
+
+class InMemoryIdempotencyRepository(IdempotencyRepository):
+    """Almacén en memoria del proceso. Útil en desarrollo o con un único worker."""
+
+    def __init__(self):
+        self._records: Dict[Tuple[str, str], IdempotencyRecord] = {}
+        self._lock = threading.Lock()
+        self._ops = 0
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [k for k, r in self._records.items() if r.expires_at <= now]
+        for k in expired:
+            del self._records[k]
+
+    def begin(self, user_id: str, key: str, fingerprint: str, ttl: float) -> Optional[IdempotencyRecord]:
+        now = time.time()
+        with self._lock:
+            self._ops += 1
+            if self._ops % _PURGE_EVERY == 0:
+                self._purge_expired(now)
+            existing = self._records.get((user_id, key))
+            if existing and existing.expires_at > now:
+                return existing
+            self._records[(user_id, key)] = IdempotencyRecord(
+                user_id=user_id, key=key, fingerprint=fingerprint, expires_at=now + ttl
+            )
+            return None
+
+    def get(self, user_id: str, key: str) -> Optional[IdempotencyRecord]:
+        with self._lock:
+            record = self._records.get((user_id, key))
+        if record and record.expires_at > time.time():
+            return record
+        return None
+
+    def complete(self, user_id: str, key: str, response: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            record = self._records.get((user_id, key))
+            if record is None:
+                return
+            self._records[(user_id, key)] = record.model_copy(
+                update={"completed": True, "response": response, "expires_at": time.time() + ttl}
+            )
+
+    def renew(self, user_id: str, key: str, ttl: float) -> None:
+        with self._lock:
+            record = self._records.get((user_id, key))
+            if record is not None and not record.completed:
+                self._records[(user_id, key)] = record.model_copy(update={"expires_at": time.time() + ttl})
+
+    def release(self, user_id: str, key: str) -> None:
+        with self._lock:
+            record = self._records.get((user_id, key))
+            if record is not None and not record.completed:
+                del self._records[(user_id, key)]
+
+
+class SQLiteIdempotencyRepository(IdempotencyRepository):
+    """Almacén persistente en SQLite; lo comparten todos los workers que apunten al mismo archivo."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                user_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                response TEXT,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (user_id, key)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at)"
+        )
+        self._lock = threading.Lock()
+        self._ops = 0
+
+    @staticmethod
+    def _to_record(row: tuple) -> IdempotencyRecord:
+        user_id, key, fingerprint, completed, response, expires_at = row
+        return IdempotencyRecord(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint,
+            completed=bool(completed),
+            response=json.loads(response) if response else None,
+            expires_at=expires_at,
+        )
+
+    def begin(self, user_id: str, key: str, fingerprint: str, ttl: float) -> Optional[IdempotencyRecord]:
+        now = time.time()
+        with self._lock:
+            self._ops += 1
+            if self._ops % _PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "DELETE FROM idempotency_keys WHERE user_id = ? AND key = ? AND expires_at <= ?",
+                    (user_id, key, now),
+                )
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO idempotency_keys (user_id, key, fingerprint, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (user_id, key, fingerprint, now + ttl),
+                )
+                row = None
+                if cur.rowcount == 0:
+                    row = self._conn.execute(
+                        "SELECT user_id, key, fingerprint, completed, response, expires_at "
+                        "FROM idempotency_keys WHERE user_id = ? AND key = ?",
+                        (user_id, key),
+                    ).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._to_record(row) if row else None
+
+    def get(self, user_id: str, key: str) -> Optional[IdempotencyRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, key, fingerprint, completed, response, expires_at "
+                "FROM idempotency_keys WHERE user_id = ? AND key = ? AND expires_at > ?",
+                (user_id, key, time.time()),
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def complete(self, user_id: str, key: str, response: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE idempotency_keys SET completed = 1, response = ?, expires_at = ? "
+                "WHERE user_id = ? AND key = ?",
+                (json.dumps(response, ensure_ascii=False), time.time() + ttl, user_id, key),
+            )
+
+    def renew(self, user_id: str, key: str, ttl: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE idempotency_keys SET expires_at = ? WHERE user_id = ? AND key = ? AND completed = 0",
+                (time.time() + ttl, user_id, key),
+            )
+
+    def release(self, user_id: str, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM idempotency_keys WHERE user_id = ? AND key = ? AND completed = 0",
+                (user_id, key),
+            )
+
+
+def create_idempotency_repository() -> IdempotencyRepository:
+    """Construye el almacén configurado en IDEMPOTENCY_STORE ("memory" o "sqlite")."""
+    if settings.idempotency_store == "sqlite":
+        return SQLiteIdempotencyRepository(settings.idempotency_sqlite_path)
+    if settings.idempotency_store != "memory":
+        logger.warning("IDEMPOTENCY_STORE desconocido (%s): usando memoria", settings.idempotency_store)
+    return InMemoryIdempotencyRepository()
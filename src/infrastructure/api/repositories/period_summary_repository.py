@@ -0,0 +1,90 @@
+import logging
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+from src.config import settings
+from src.domain.models import PeriodSummary
+from src.domain.repositories import PeriodSummaryRepository
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryPeriodSummaryRepository(PeriodSummaryRepository):
+    """Resúmenes en memoria del proceso (se pierden al reiniciar)."""
+
+    def __init__(self):
+        self._summaries: Dict[Tuple[str, str], PeriodSummary] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, user_id: str, periodos: List[str]) -> Dict[str, PeriodSummary]:
+        with self._lock:
+            return {p: self._summaries[(user_id, p)] for p in periodos if (user_id, p) in self._summaries}
+
+    def save_many(self, summaries: List[PeriodSummary]) -> None:
+        with self._lock:
+            for s in summaries:
+                self._summaries[(s.user_id, s.periodo)] = s
+
+
+class SQLitePeriodSummaryRepository(PeriodSummaryRepository):
+    """Resúmenes persistentes en SQLite."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS period_summaries (
+                user_id TEXT NOT NULL,
+                periodo TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (user_id, periodo)
+            )
+            """
+        )
+        self._lock = threading.Lock()
+
+    def get_many(self, user_id: str, periodos: List[str]) -> Dict[str, PeriodSummary]:
+        if not periodos:
+            return {}
+        placeholders = ", ".join("?" for _ in periodos)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, periodo, fingerprint, summary, updated_at FROM period_summaries "
+                f"WHERE user_id = ? AND periodo IN ({placeholders})",
+                [user_id, *periodos],
+            ).fetchall()
+        return {
+            r[1]: PeriodSummary(user_id=r[0], periodo=r[1], fingerprint=r[2], summary=r[3], updated_at=r[4])
+            for r in rows
+        }
+
+    def save_many(self, summaries: List[PeriodSummary]) -> None:
+        if not summaries:
+            return
+        rows = [(s.user_id, s.periodo, s.fingerprint, s.summary, s.updated_at) for s in summaries]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO period_summaries (user_id, periodo, fingerprint, summary, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+def create_period_summary_repository() -> PeriodSummaryRepository:
+    """Construye el almacén configurado en PERIOD_SUMMARY_STORE ("memory" o "sqlite")."""
+    if settings.period_summary_store == "sqlite":
+        return SQLitePeriodSummaryRepository(settings.period_summary_sqlite_path)
+    if settings.period_summary_store != "memory":
+        logger.warning("PERIOD_SUMMARY_STORE desconocido (%s): usando memoria", settings.period_summary_store)
+    return InMemoryPeriodSummaryRepository()
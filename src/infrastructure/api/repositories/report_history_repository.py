@@ -0,0 +1,125 @@
+import json
+import logging
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+from src.config import settings
+from src.domain.models import ReportHistoryEntry
+from src.domain.repositories import ReportHistoryRepository
+from .supabase_service_client import create_service_client
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = "id, user_id, actividades, report, degraded, created_at"
+
+
+class SupabaseReportHistoryRepository(ReportHistoryRepository):
+    """Historial en la tabla `report_history` de Supabase (PostgREST).
+
+    Requiere el índice (user_id, created_at desc, id desc) para que la paginación por
+    cursor sea una lectura indexada; ver la sección "Historial de reportes" del README.
+    Usa la service-role key: la tabla tiene RLS activado y no es accesible con la anon key.
+    `before` ya viene validado por `ReportHistoryService.decode_cursor`.
+    """
+
+    table = "report_history"
+
+    def __init__(self):
+        self.supabase = create_service_client()
+
+    def insert_many(self, entries: List[ReportHistoryEntry]) -> None:
+        if not entries:
+            return
+        self.supabase.table(self.table).insert([e.model_dump() for e in entries]).execute()
+
+    def list_by_user(
+        self, user_id: str, limit: int, before: Optional[Tuple[str, str]] = None
+    ) -> List[ReportHistoryEntry]:
+        query = self.supabase.table(self.table).select(_COLUMNS).eq("user_id", user_id)
+        if before is not None:
+            created_at, entry_id = before
+            query = query.or_(
+                f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{entry_id}")'
+            )
+        response = query.order("created_at", desc=True).order("id", desc=True).limit(limit).execute()
+        return [ReportHistoryEntry(**row) for row in (response.data or [])]
+
+
+class SQLiteReportHistoryRepository(ReportHistoryRepository):
+    """Sustituto local del historial en SQLite, con el mismo orden y paginación."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS report_history (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                actividades TEXT NOT NULL,
+                report TEXT NOT NULL,
+                degraded INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_report_history_user_created "
+            "ON report_history (user_id, created_at DESC, id DESC)"
+        )
+        self._lock = threading.Lock()
+
+    def insert_many(self, entries: List[ReportHistoryEntry]) -> None:
+        if not entries:
+            return
+        rows = [
+            (e.id, e.user_id, json.dumps(e.actividades, ensure_ascii=False), e.report, int(e.degraded), e.created_at)
+            for e in entries
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO report_history ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def list_by_user(
+        self, user_id: str, limit: int, before: Optional[Tuple[str, str]] = None
+    ) -> List[ReportHistoryEntry]:
+        sql = f"SELECT {_COLUMNS} FROM report_history WHERE user_id = ?"
+        params: list = [user_id]
+        if before is not None:
+            sql += " AND (created_at, id) < (?, ?)"
+            params.extend(before)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            ReportHistoryEntry(
+                id=r[0], user_id=r[1], actividades=json.loads(r[2]), report=r[3], degraded=bool(r[4]), created_at=r[5]
+            )
+            for r in rows
+        ]
+
+
+def create_report_history_repository() -> ReportHistoryRepository:
+    """Construye el almacén configurado en REPORT_HISTORY_STORE ("supabase" o "sqlite")."""
+    if settings.report_history_store == "sqlite":
+        return SQLiteReportHistoryRepository(settings.report_history_sqlite_path)
+    if settings.report_history_store != "supabase":
+        logger.warning("REPORT_HISTORY_STORE desconocido (%s): usando supabase", settings.report_history_store)
+    if not settings.supabase_service_role_key:
+        # El historial es opcional: sin la service-role key no debe impedir arrancar la API
+        logger.warning(
+            "REPORT_HISTORY_STORE=supabase requiere SUPABASE_SERVICE_ROLE_KEY: usando SQLite (%s)",
+            settings.report_history_sqlite_path,
+        )
+        return SQLiteReportHistoryRepository(settings.report_history_sqlite_path)
+    return SupabaseReportHistoryRepository()
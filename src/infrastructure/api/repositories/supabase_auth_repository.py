@@ -1,4 +1,4 @@
-from typing import Optional, Any
+from typing import Optional, Any, Dict, List, NoReturn
 import logging
 
 from postgrest import APIResponse
@@ -9,11 +9,31 @@ import httpx
 from src.config import settings
 from src.domain.models import User
 from src.domain.repositories import AuthRepository
-from src.domain.errors import InvalidCredentialsError, EmailNotConfirmedError, UserAlreadyExistsError
+from src.domain.errors import (
+    InvalidCredentialsError,
+    EmailNotConfirmedError,
+    UserAlreadyExistsError,
+    AuthRateLimitedError,
+)
+
+from .supabase_service_client import create_service_client
 
 logger = logging.getLogger(__name__)
 
 
+def _raise_sign_up_error(e: AuthApiError, email: str) -> NoReturn:
+    """Traduce los errores de alta de Supabase a errores de dominio (o los propaga)."""
+    msg = str(e).lower()
+    # Mensaje común cuando el email ya existe
+    if "already registered" in msg or "email already registered" in msg or "user already exists" in msg or "duplicate" in msg:
+        raise UserAlreadyExistsError(email=email)
+    # Límite de frecuencia de Supabase (p. ej. "email rate limit exceeded")
+    if getattr(e, 'status', None) == 429 or "rate limit" in msg:
+        raise AuthRateLimitedError()
+    # Otros errores los propagamos como genéricos
+    raise e
+
+
 class SupabaseAuthRepository(AuthRepository):
     def __init__(self):
         self.supabase = create_client(settings.supabase_url, settings.supabase_key)
@@ -165,12 +185,7 @@ class SupabaseAuthRepository(AuthRepository):
             # Si la respuesta no contiene usuario, devolvemos None
             return None
         except AuthApiError as e:
-            msg = str(e).lower()
-            # Mensaje común cuando el email ya existe
-            if "already registered" in msg or "email already registered" in msg or "user already exists" in msg or "duplicate" in msg:
-                raise UserAlreadyExistsError(email=email)
-            # Otros errores los propagamos como genéricos
-            raise
+            _raise_sign_up_error(e, email)
         except Exception:
             # No exponer detalles sensibles
             raise
@@ -213,4 +228,53 @@ class SupabaseAuthRepository(AuthRepository):
 
         except Exception as e:
             print(f"Error inesperado al buscar usuario por RPC: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def find_ids_by_emails(self, emails: List[str]) -> Dict[str, str]:
+        """Busca varios emails con una sola llamada a la función `get_user_ids_by_emails`.
+
+        Devuelve {email en minúsculas: user_id} solo para los emails que ya existen.
+        A diferencia de `find_by_email`, propaga los errores para que el llamador sepa
+        que la consulta no se hizo.
+        """
+        if not emails:
+            return {}
+        response: APIResponse = self.supabase.rpc(
+            "get_user_ids_by_emails", {"p_emails": emails}
+        ).execute()
+
+        found: Dict[str, str] = {}
+        for row in response.data or []:
+            if not isinstance(row, dict):
+                continue
+            email = row.get('email')
+            user_id = row.get('id') or row.get('user_id')
+            if email and user_id:
+                found[str(email).lower()] = str(user_id)
+        return found
+
+
+class SupabaseAdminAuthRepository(SupabaseAuthRepository):
+    """Operaciones de administración de cuentas con la clave de service role.
+
+    Las altas usan `auth.admin.create_user`, que no abre sesión en el cliente: a diferencia
+    de `sign_up`, varias altas pueden compartir el cliente desde distintos hilos.
+    """
+
+    def __init__(self):
+        self.supabase = create_service_client()
+
+    def create_account(self, email: str, password: str) -> Optional[User]:
+        """Crea la cuenta ya confirmada (el admin responde por el email)."""
+        try:
+            response = self.supabase.auth.admin.create_user({
+                "email": email,
+                "password": password,
+                "email_confirm": True,
+            })
+            user = getattr(response, 'user', None)
+            if user:
+                return User(id=user.id, email=user.email)
+            return None
+        except AuthApiError as e:
+            _raise_sign_up_error(e, email)
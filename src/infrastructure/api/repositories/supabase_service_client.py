@@ -0,0 +1,23 @@
+from supabase import Client, ClientOptions, create_client
+
+from src.config import settings
+
+
+def create_service_client() -> Client:
+    """Cliente de Supabase con la service-role key, solo para uso en el servidor.
+
+    Lo usan los almacenes internos (historial, registro de uso, altas masivas), cuyas
+    tablas y funciones no deben ser accesibles con la anon key: tienen RLS activado sin
+    políticas y solo la service role (que omite RLS) puede leerlas o escribirlas.
+    No guarda sesión, así que ninguna llamada de auth cambia las credenciales del cliente.
+    """
+    if not settings.supabase_service_role_key:
+        raise RuntimeError(
+            "Define SUPABASE_SERVICE_ROLE_KEY para usar los almacenes en Supabase "
+            "(o configura el almacén SQLite local)"
+        )
+    return create_client(
+        settings.supabase_url,
+        settings.supabase_service_role_key,
+        options=ClientOptions(auto_refresh_token=False, persist_session=False),
+    )
@@ -0,0 +1,131 @@
+import logging
+import sqlite3
+import threading
+from typing import List, Optional
+
+from src.config import settings
+from src.domain.models import UsageRecord
+from src.domain.repositories import UsageRepository
+
+from .supabase_service_client import create_service_client
+
+logger = logging.getLogger(__name__)
+
+_KEY_COLUMNS = ("user_id", "client", "hour", "model")
+_COUNTER_COLUMNS = ("requests", "fallbacks", "errors", "input_tokens", "output_tokens", "latency_ms_total")
+_COLUMNS = ", ".join([*_KEY_COLUMNS, *_COUNTER_COLUMNS, "latency_ms_max"])
+
+
+class SupabaseUsageRepository(UsageRepository):
+    """Uso en la tabla `usage_ledger` de Supabase.
+
+    Las filas se suman con la función `add_usage` (un solo INSERT ... ON CONFLICT por lote);
+    ver la sección "Uso del modelo" del README. La tabla y la función solo son accesibles
+    con la service role. Las lecturas se paginan para no quedar cortadas por el máximo de
+    filas por respuesta de PostgREST.
+    """
+
+    table = "usage_ledger"
+    page_size = 1000
+
+    def __init__(self):
+        self.supabase = create_service_client()
+
+    def add_many(self, records: List[UsageRecord]) -> None:
+        if not records:
+            return
+        self.supabase.rpc("add_usage", {"p_rows": [r.model_dump() for r in records]}).execute()
+
+    def list_usage(self, user_id: Optional[str], since: str, until: str) -> List[UsageRecord]:
+        records: List[UsageRecord] = []
+        while True:
+            query = self.supabase.table(self.table).select(_COLUMNS).gte("hour", since).lt("hour", until)
+            if user_id is not None:
+                query = query.eq("user_id", user_id)
+            # Orden total (toda la clave primaria) para que las páginas no se solapen
+            query = query.order("hour", desc=True).order("user_id").order("client").order("model")
+            response = query.range(len(records), len(records) + self.page_size - 1).execute()
+            rows = response.data or []
+            if not rows:
+                return records
+            records.extend(UsageRecord(**row) for row in rows)
+
+
+class SQLiteUsageRepository(UsageRepository):
+    """Sustituto local del registro de uso en SQLite."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS usage_ledger (
+                user_id TEXT NOT NULL,
+                client TEXT NOT NULL,
+                hour TEXT NOT NULL,
+                model TEXT NOT NULL,
+                requests INTEGER NOT NULL DEFAULT 0,
+                fallbacks INTEGER NOT NULL DEFAULT 0,
+                errors INTEGER NOT NULL DEFAULT 0,
+                input_tokens INTEGER NOT NULL DEFAULT 0,
+                output_tokens INTEGER NOT NULL DEFAULT 0,
+                latency_ms_total INTEGER NOT NULL DEFAULT 0,
+                latency_ms_max INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, client, hour, model)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_usage_ledger_hour ON usage_ledger (hour)")
+        self._lock = threading.Lock()
+
+    def add_many(self, records: List[UsageRecord]) -> None:
+        if not records:
+            return
+        updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in _COUNTER_COLUMNS)
+        sql = (
+            f"INSERT INTO usage_ledger ({_COLUMNS}) VALUES ({', '.join('?' for _ in range(11))}) "
+            f"ON CONFLICT ({', '.join(_KEY_COLUMNS)}) DO UPDATE SET {updates}, "
+            "latency_ms_max = max(latency_ms_max, excluded.latency_ms_max)"
+        )
+        rows = [
+            (r.user_id, r.client, r.hour, r.model, r.requests, r.fallbacks, r.errors,
+             r.input_tokens, r.output_tokens, r.latency_ms_total, r.latency_ms_max)
+            for r in records
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def list_usage(self, user_id: Optional[str], since: str, until: str) -> List[UsageRecord]:
+        sql = f"SELECT {_COLUMNS} FROM usage_ledger WHERE hour >= ? AND hour < ?"
+        params: list = [since, until]
+        if user_id is not None:
+            sql += " AND user_id = ?"
+            params.append(user_id)
+        sql += " ORDER BY hour DESC"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        names = _COLUMNS.split(", ")
+        return [UsageRecord(**dict(zip(names, r))) for r in rows]
+
+
+def create_usage_repository() -> UsageRepository:
+    """Construye el almacén configurado en USAGE_STORE ("supabase" o "sqlite")."""
+    if settings.usage_store == "sqlite":
+        return SQLiteUsageRepository(settings.usage_sqlite_path)
+    if settings.usage_store != "supabase":
+        logger.warning("USAGE_STORE desconocido (%s): usando supabase", settings.usage_store)
+    if not settings.supabase_service_role_key:
+        # El registro de uso es opcional: sin la service-role key no debe impedir arrancar la API
+        logger.warning(
+            "USAGE_STORE=supabase requiere SUPABASE_SERVICE_ROLE_KEY: usando SQLite (%s)",
+            settings.usage_sqlite_path,
+        )
+        return SQLiteUsageRepository(settings.usage_sqlite_path)
+    return SupabaseUsageRepository()
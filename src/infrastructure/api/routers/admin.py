@@ -0,0 +1,41 @@
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from pydantic import ValidationError
+
+from ...api.dependencies import admin_scheme
+from ....domain.models import User
+from ....runtime_config import ConfigAuditEntry, RuntimeSettings, runtime_config
+
+router = APIRouter(prefix="/admin", tags=["Administracion"])
+
+
+@router.get("/config", response_model=RuntimeSettings)
+async def obtener_config(_user: User = Depends(admin_scheme)) -> RuntimeSettings:
+    """Parámetros de rendimiento vigentes."""
+    return runtime_config.current
+
+
+@router.patch("/config", response_model=RuntimeSettings)
+async def actualizar_config(
+    changes: Dict[str, Any] = Body(..., examples=[{"genai_timeout": 30, "genai_max_concurrency": 8}]),
+    user: User = Depends(admin_scheme),
+) -> RuntimeSettings:
+    """Cambia parámetros en caliente, sin reiniciar.
+
+    Se valida la configuración completa resultante antes de aplicarla; si algún valor no es
+    válido no se cambia nada. El cambio queda registrado en el log de auditoría.
+    """
+    try:
+        return runtime_config.update(changes, actor=user.email, source="api")
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.errors(include_url=False, include_context=False),
+        )
+
+
+@router.get("/config/audit", response_model=List[ConfigAuditEntry])
+async def auditoria_config(_user: User = Depends(admin_scheme)) -> List[ConfigAuditEntry]:
+    """Cambios recientes de configuración (más antiguos primero)."""
+    return runtime_config.audit_log()
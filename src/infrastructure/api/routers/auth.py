@@ -1,14 +1,26 @@
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi.responses import StreamingResponse
 
-from ....application.services import AuthService
+from ....application.services import AuthService, BulkAccountService
 from ....domain.models import AuthTokenResponse, LoginRequest, User, RefreshRequest
 from ....domain.errors import InvalidCredentialsError, EmailNotConfirmedError
-from ...api.dependencies import jwt_scheme
+from ....runtime_config import RuntimeSettings, runtime_config
+from ...api.dependencies import admin_scheme, jwt_scheme
 
 router = APIRouter(prefix="/auth", tags=["Autenticacion"])
 auth_service = AuthService()
+bulk_account_service = BulkAccountService(concurrency=runtime_config.current.bulk_signup_concurrency)
+
+MAX_BULK_ACCOUNTS = 2000
+
+
+def _apply_runtime_config(cfg: RuntimeSettings) -> None:
+    bulk_account_service.concurrency = cfg.bulk_signup_concurrency
+
+
+runtime_config.subscribe(_apply_runtime_config)
 
 
 @router.post("/get-token", response_model=AuthTokenResponse)
@@ -29,6 +41,45 @@ async def create_acount(body: LoginRequest) -> Any:
     return await auth_service.create_account(body.email, body.password)
 
 
+@router.post(
+    "/accounts/bulk",
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"example": [{"email": "alumno@ejemplo.com", "password": "contraseña123"}]},
+                "text/csv": {"example": "email,password\nalumno@ejemplo.com,contraseña123\n"},
+            },
+        }
+    },
+)
+async def create_accounts_bulk(request: Request, _admin: User = Depends(admin_scheme)) -> StreamingResponse:
+    """Alta masiva de cuentas (solo admins).
+
+    Recibe un CSV (`Content-Type: text/csv`, cabecera `email,password`) o una lista JSON de
+    `{email, password}` y devuelve NDJSON: una línea `BulkAccountResult` por fila, en
+    cuanto se conoce su resultado (no en el orden de entrada).
+    """
+    try:
+        rows = BulkAccountService.parse_rows(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Entrada inválida: {e}")
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No hay cuentas en la entrada")
+    if len(rows) > MAX_BULK_ACCOUNTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo {MAX_BULK_ACCOUNTS} cuentas por petición",
+        )
+
+    async def _stream():
+        async for result in bulk_account_service.provision(rows):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+
 @router.post("/refresh-token", response_model=AuthTokenResponse)
 async def refresh_token(body: RefreshRequest) -> AuthTokenResponse:
     """Renueva tokens a partir de un refresh_token proporcionado por el cliente.
@@ -1,18 +1,206 @@
-from fastapi import APIRouter, Depends
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 
 from ...api.dependencies import jwt_scheme
-from ....application.services import ReportService
-from ....domain.models import ReportResponse, User
-from ....genkit_flow import ReportRequest
+from ...api.repositories.idempotency_repository import create_idempotency_repository
+from ...api.repositories.report_history_repository import create_report_history_repository
+from ...api.repositories.period_summary_repository import create_period_summary_repository
+from ...document_renderer import DocumentRenderer, FORMATS, iter_file, remove_file
+from ...write_behind import WriteBehindBuffer
+from ....application.services import (
+    ReportService,
+    IdempotencyService,
+    ReportHistoryService,
+    PeriodReportService,
+    DraftService,
+)
+from ....config import settings
+from ....domain.errors import IdempotencyKeyReuseError, IdempotencyRequestInProgressError, InvalidCursorError
+from ....domain.models import (
+    ReportResponse,
+    ReportHistoryPage,
+    PeriodReportRequest,
+    PeriodReportResponse,
+    DraftResponse,
+    RenderRequest,
+    User,
+)
+from ....genkit_flow import ReportRequest, generar_reporte
+from ....runtime_config import RuntimeSettings, runtime_config
 
 router = APIRouter(prefix="/reports", tags=["reports"])
-report_service = ReportService()
+_runtime = runtime_config.current
+_history_repository = create_report_history_repository()
+report_history_service = ReportHistoryService(
+    _history_repository,
+    WriteBehindBuffer(
+        _history_repository.insert_many,
+        batch_size=_runtime.report_history_batch_size,
+        flush_interval=_runtime.report_history_flush_interval,
+        max_pending=_runtime.report_history_max_pending,
+        name="report-history",
+    ),
+)
+draft_service = DraftService(
+    generar_reporte,
+    debounce=_runtime.draft_debounce,
+    ttl=_runtime.draft_ttl,
+    max_per_hour=_runtime.draft_max_per_hour,
+    max_concurrent=_runtime.draft_max_concurrent,
+)
+report_service = ReportService(history=report_history_service, drafts=draft_service)
+period_report_service = PeriodReportService(create_period_summary_repository(), concurrency=_runtime.map_concurrency)
+document_renderer = DocumentRenderer(settings.report_template_docx, workers=settings.render_workers)
+idempotency_service = IdempotencyService(
+    create_idempotency_repository(),
+    ttl=_runtime.idempotency_ttl,
+    wait_timeout=_runtime.idempotency_wait_timeout,
+    reservation_ttl=_runtime.idempotency_reservation_ttl,
+)
+
+
+def _apply_runtime_config(cfg: RuntimeSettings) -> None:
+    """Aplica en caliente los parámetros de ajuste a los servicios de este router."""
+    buffer = report_history_service.buffer
+    buffer.batch_size = cfg.report_history_batch_size
+    buffer.flush_interval = cfg.report_history_flush_interval
+    buffer.max_pending = cfg.report_history_max_pending
+    draft_service.debounce = cfg.draft_debounce
+    draft_service.ttl = cfg.draft_ttl
+    draft_service.max_per_hour = cfg.draft_max_per_hour
+    draft_service.max_concurrent = cfg.draft_max_concurrent
+    idempotency_service.ttl = cfg.idempotency_ttl
+    idempotency_service.wait_timeout = cfg.idempotency_wait_timeout
+    idempotency_service.reservation_ttl = cfg.idempotency_reservation_ttl
+    period_report_service.concurrency = cfg.map_concurrency
+
+
+runtime_config.subscribe(_apply_runtime_config)
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
 
 
 @router.post("/", response_model=ReportResponse)
 async def crear_reporte(
     data: ReportRequest,
-    user: User = Depends(jwt_scheme)
+    response: Response,
+    user: User = Depends(jwt_scheme),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
     # `jwt_scheme` ya valida el token (desde Authorization Bearer o cookie) y devuelve el User
-    return await report_service.create_report(data)
+    if idempotency_key is None:
+        return await report_service.create_report(data, user)
+
+    if not idempotency_key.strip() or len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Idempotency-Key inválido")
+
+    try:
+        report, replayed = await idempotency_service.run(
+            user.id,
+            idempotency_key,
+            data,
+            lambda: report_service.create_report(data, user),
+            ReportResponse,
+        )
+    except IdempotencyKeyReuseError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except IdempotencyRequestInProgressError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return report
+
+
+@router.get("/history", response_model=ReportHistoryPage)
+async def historial_reportes(
+    limit: int = Query(20, ge=1, le=100, description="Reportes por página"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` de la página anterior"),
+    user: User = Depends(jwt_scheme),
+):
+    """Historial de reportes del usuario, del más reciente al más antiguo (paginación por cursor)."""
+    try:
+        return await report_history_service.list_history(user.id, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/period", response_model=PeriodReportResponse)
+async def crear_reporte_periodo(
+    data: PeriodReportRequest,
+    user: User = Depends(jwt_scheme),
+):
+    """Reporte de un periodo largo compuesto de forma incremental a partir de sus subperiodos.
+
+    Los resúmenes de subperiodos cuyas actividades no cambiaron se reutilizan; solo se
+    generan los nuevos o modificados.
+    """
+    if not data.has_activities():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El periodo no contiene actividades")
+    return await period_report_service.create_period_report(user, data)
+
+
+@router.post("/draft", response_model=DraftResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enviar_borrador(
+    data: ReportRequest,
+    user: User = Depends(jwt_scheme),
+):
+    """Envía las actividades parciales para pre-generar el reporte en segundo plano.
+
+    Si el POST /reports/ final llega con las mismas actividades, reutiliza el resultado
+    (o espera la generación en curso) en lugar de empezar desde cero.
+    """
+    return draft_service.submit(user.id, data)
+
+
+@router.delete("/draft", status_code=status.HTTP_204_NO_CONTENT)
+async def cancelar_borrador(user: User = Depends(jwt_scheme)):
+    """Cancela el borrador especulativo del usuario, si existe."""
+    draft_service.cancel(user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+class _DocumentResponse(StreamingResponse):
+    """Envía un documento temporal por bloques y lo borra al terminar, aunque el cliente se desconecte."""
+
+    def __init__(self, path: str, formato: str):
+        super().__init__(
+            iter_file(path),
+            media_type=FORMATS[formato],
+            headers={
+                "Content-Disposition": f'attachment; filename="reporte.{formato}"',
+                "Content-Length": str(os.path.getsize(path)),
+            },
+        )
+        self.path = path
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # Si el envío se interrumpe, el iterador puede no haber llegado a su finally
+            await self.body_iterator.aclose()
+            remove_file(self.path)
+
+
+@router.post("/render", response_class=StreamingResponse)
+async def renderizar_reporte(
+    data: RenderRequest,
+    formato: str = Query("docx", pattern="^(docx|pdf)$", description="docx o pdf"),
+    user: User = Depends(jwt_scheme),
+):
+    """Renderiza el reporte en la plantilla oficial (DOCX) o en PDF y lo envía por bloques.
+
+    Si el body no incluye `report`, primero se genera a partir de `actividades`.
+    """
+    report = data.report
+    if not report:
+        if not data.actividades:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Envía report o actividades")
+        report = (await report_service.create_report(ReportRequest(actividades=data.actividades), user)).report
+
+    path = await document_renderer.render(formato, {**data.campos, "report": report})
+    return _DocumentResponse(path, formato)
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+
+from .reports import report_service
+from ...api.dependencies import authenticate_token
+from .... import usage
+from ....domain.models import ReportRequest, User
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+# Segundos para enviar el mensaje de autenticación tras conectar
+AUTH_TIMEOUT = 10.0
+# Generaciones simultáneas permitidas por conexión
+MAX_IN_FLIGHT_PER_CONNECTION = 4
+
+
+class ReportSession:
+    """Sesión WebSocket autenticada: varias generaciones por la misma conexión.
+
+    Cada generación corre en su propia tarea, identificada por el `id` que envía el
+    cliente; cancelarla (o reemplazarla) cancela la tarea y con ella la llamada en curso
+    a `ai.generate`.
+    """
+
+    def __init__(self, websocket: WebSocket, user: User):
+        self.websocket = websocket
+        self.user = user
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.closed = False
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        if self.closed:
+            return
+        async with self._send_lock:
+            await self.websocket.send_json(message)
+
+    def cancel(self, request_id: str) -> bool:
+        # Se saca del registro al cancelar: ya no cuenta como generación en curso
+        task = self.tasks.pop(request_id, None)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    def cancel_all(self) -> None:
+        for request_id in list(self.tasks):
+            self.cancel(request_id)
+
+    def in_flight(self) -> int:
+        return sum(1 for t in self.tasks.values() if not t.done() and not t.cancelling())
+
+    def close(self) -> None:
+        self.closed = True
+        self.cancel_all()
+
+    async def _generate(self, request_id: str, report_request: ReportRequest) -> None:
+        try:
+            report = await report_service.create_report(report_request, self.user)
+        except asyncio.CancelledError:
+            await self.send({"type": "cancelled", "id": request_id})
+            raise
+        except Exception as e:
+            logger.warning("Generación %s por WebSocket falló: %s", request_id, e)
+            await self.send({"type": "error", "id": request_id, "detail": "Error al generar el reporte"})
+        else:
+            await self.send({"type": "result", "id": request_id, **report.model_dump()})
+        finally:
+            if self.tasks.get(request_id) is asyncio.current_task():
+                del self.tasks[request_id]
+
+    async def handle(self, message: Dict[str, Any]) -> None:
+        kind = message.get("type")
+        request_id = str(message.get("id") or "")
+        if kind == "cancel":
+            if not self.cancel(request_id):
+                await self.send({"type": "error", "id": request_id, "detail": "No hay una generación en curso con ese id"})
+            return
+        if kind != "generate":
+            await self.send({"type": "error", "id": request_id or None, "detail": "Tipo de mensaje desconocido"})
+            return
+        if not request_id:
+            await self.send({"type": "error", "id": None, "detail": "Falta el id de la petición"})
+            return
+        try:
+            report_request = ReportRequest(actividades=message.get("actividades"))
+        except ValidationError:
+            await self.send({"type": "error", "id": request_id, "detail": "Lista de actividades inválida"})
+            return
+
+        # Un id repetido o `supersede` reemplazan a las generaciones anteriores
+        if message.get("supersede"):
+            self.cancel_all()
+        else:
+            self.cancel(request_id)
+        if self.in_flight() >= MAX_IN_FLIGHT_PER_CONNECTION:
+            await self.send({"type": "error", "id": request_id, "detail": "Demasiadas generaciones en curso"})
+            return
+        self.tasks[request_id] = asyncio.create_task(self._generate(request_id, report_request))
+
+
+async def _authenticate(websocket: WebSocket) -> Optional[User]:
+    """Autentica con el header Authorization o, si no viene (navegadores), con el primer mensaje
+    `{"type": "auth", "token": "<access_token>"}`.
+    """
+    header = websocket.headers.get("authorization", "")
+    if header.lower().startswith("bearer "):
+        return await authenticate_token(header[7:].strip())
+    try:
+        message = await asyncio.wait_for(websocket.receive_json(), timeout=AUTH_TIMEOUT)
+    except (asyncio.TimeoutError, json.JSONDecodeError, KeyError):
+        return None
+    if not isinstance(message, dict) or message.get("type") != "auth":
+        return None
+    return await authenticate_token(message.get("token"))
+
+
+@router.websocket("/ws")
+async def reportes_ws(websocket: WebSocket):
+    """Sesión WebSocket para generar varios reportes con una sola conexión autenticada.
+
+    Mensajes del cliente:
+    - `{"type": "auth", "token": "..."}` (primer mensaje, si no se envió Authorization)
+    - `{"type": "generate", "id": "r1", "actividades": [...], "supersede": true}`
+    - `{"type": "cancel", "id": "r1"}`
+
+    Mensajes del servidor: `ready`, `result` (con `report` y `degraded`), `cancelled` y `error`,
+    todos con el `id` de la petición.
+    """
+    await websocket.accept()
+    try:
+        user = await _authenticate(websocket)
+    except WebSocketDisconnect:
+        return
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token inválido")
+        return
+
+    # Las generaciones de la sesión heredan este contexto (tareas creadas desde aquí)
+    usage.bind(user.id, websocket.headers.get("x-client-id") or "websocket")
+    session = ReportSession(websocket, user)
+    await session.send({"type": "ready", "user_id": user.id})
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except (json.JSONDecodeError, KeyError):
+                await session.send({"type": "error", "id": None, "detail": "Mensaje JSON inválido"})
+                continue
+            if not isinstance(message, dict):
+                await session.send({"type": "error", "id": None, "detail": "Mensaje JSON inválido"})
+                continue
+            await session.handle(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session.close()
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from ...api.dependencies import is_admin, jwt_scheme
+from ...api.repositories.usage_repository import create_usage_repository
+from ....application.services import UsageService
+from ....domain.models import UsageReport, User
+from ....runtime_config import RuntimeSettings, runtime_config
+from ....usage import usage_ledger
+
+router = APIRouter(prefix="/usage", tags=["usage"])
+usage_service = UsageService(create_usage_repository(), usage_ledger)
+
+MAX_USAGE_RANGE = timedelta(days=31)
+
+
+def _apply_runtime_config(cfg: RuntimeSettings) -> None:
+    usage_ledger.flush_interval = cfg.usage_flush_interval
+    usage_ledger.batch_size = cfg.usage_batch_size
+
+
+runtime_config.subscribe(_apply_runtime_config)
+
+
+@router.get("/", response_model=UsageReport)
+async def consultar_uso(
+    desde: Optional[datetime] = Query(None, description="Inicio (ISO 8601); por defecto, hace 24 horas"),
+    hasta: Optional[datetime] = Query(None, description="Fin, exclusivo (ISO 8601); por defecto, ahora"),
+    user_id: Optional[str] = Query(None, description="Solo admins: usuario a consultar (sin él, todos)"),
+    user: User = Depends(jwt_scheme),
+):
+    """Uso del modelo por hora (tokens, reportes, fallbacks y latencia), con totales del rango.
+
+    Cada usuario ve su propio uso; los admins pueden consultar cualquier usuario o todos.
+    """
+    if not is_admin(user):
+        if user_id is not None and user_id != user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo puedes consultar tu propio uso")
+        user_id = user.id
+
+    hasta = hasta or datetime.now(timezone.utc)
+    desde = desde or hasta - timedelta(hours=24)
+    if hasta.tzinfo is None:
+        hasta = hasta.replace(tzinfo=timezone.utc)
+    if desde.tzinfo is None:
+        desde = desde.replace(tzinfo=timezone.utc)
+    if desde >= hasta:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="`desde` debe ser anterior a `hasta`")
+    if hasta - desde > MAX_USAGE_RANGE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El rango máximo es de 31 días")
+    return await usage_service.report(user_id, desde, hasta)
@@ -0,0 +1,334 @@
+"""Renderizado del reporte en la plantilla oficial (DOCX) o en PDF.
+
+Las plantillas se analizan una sola vez por proceso y se guardan compiladas: para DOCX,
+las partes estáticas del paquete y el `word/document.xml` dividido en segmentos
+literales y nombres de campo; para PDF, los objetos fijos del documento. Renderizar es
+solo concatenar segmentos y escribir a un archivo temporal, que luego se envía al cliente
+por bloques (`iter_file`) sin cargarlo entero en memoria y se borra al terminar el envío,
+también si el cliente se desconecta. El trabajo CPU se ejecuta en un pool de procesos
+(arrancados con `spawn`, no con `fork`, para no heredar hilos ni locks del servidor) y no
+bloquea el event loop.
+"""
+import asyncio
+import multiprocessing
+import os
+import re
+import tempfile
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from xml.sax.saxutils import escape
+
+FORMATS = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+
+# Tamaño de cada bloque al enviar el documento
+CHUNK_SIZE = 64 * 1024
+
+# Marcador {{campo}}; Word puede partirlo en varios runs, por eso se toleran etiquetas XML
+# entre las llaves y el nombre.
+_TAG = r"(?:<[^>]*>)*"
+_PLACEHOLDER = re.compile(
+    r"\{" + _TAG + r"\{" + _TAG + r"\s*([A-Za-z_]\w*)\s*" + _TAG + r"\}" + _TAG + r"\}"
+)
+
+_DEFAULT_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DEFAULT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+def _docx_paragraph(text: str, bold: bool = False) -> str:
+    props = "<w:rPr><w:b/></w:rPr>" if bold else ""
+    return f'<w:p><w:r>{props}<w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+
+_DEFAULT_DOCUMENT = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+    + _docx_paragraph("Reporte de actividades", bold=True)
+    + _docx_paragraph("Nombre: {{nombre}}")
+    + _docx_paragraph("Periodo: {{periodo}}")
+    + _docx_paragraph("{{report}}")
+    + '</w:body></w:document>'
+)
+
+
+class CompiledDocx:
+    """Plantilla DOCX compilada: partes estáticas + document.xml en segmentos."""
+
+    def __init__(self, parts: List[Tuple[str, bytes]], segments: List[Union[str, Tuple[str]]]):
+        self.parts = parts
+        # Los campos se representan como tuplas de un elemento para distinguirlos del texto
+        self.segments = segments
+
+    @classmethod
+    def compile(cls, path: Optional[str]) -> "CompiledDocx":
+        if path:
+            with zipfile.ZipFile(path) as zf:
+                parts = [(i.filename, zf.read(i)) for i in zf.infolist() if i.filename != "word/document.xml"]
+                document = zf.read("word/document.xml").decode("utf-8")
+        else:
+            parts = [
+                ("[Content_Types].xml", _DEFAULT_CONTENT_TYPES.encode("utf-8")),
+                ("_rels/.rels", _DEFAULT_RELS.encode("utf-8")),
+            ]
+            document = _DEFAULT_DOCUMENT
+
+        segments: List[Union[str, Tuple[str]]] = []
+        pos = 0
+        for m in _PLACEHOLDER.finditer(document):
+            segments.append(document[pos:m.start()])
+            segments.append((m.group(1),))
+            pos = m.end()
+        segments.append(document[pos:])
+        return cls(parts, segments)
+
+    def render(self, campos: Dict[str, str], out_path: str) -> None:
+        chunks = []
+        for seg in self.segments:
+            if isinstance(seg, tuple):
+                value = escape(campos.get(seg[0], ""))
+                # Los saltos de línea se convierten en saltos de Word dentro del mismo run
+                chunks.append(value.replace("\n", '</w:t><w:br/><w:t xml:space="preserve">'))
+            else:
+                chunks.append(seg)
+        with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for name, data in self.parts:
+                zf.writestr(name, data)
+            zf.writestr("word/document.xml", "".join(chunks).encode("utf-8"))
+
+
+# Anchos de Helvetica (AFM estándar, milésimas de em) para ASCII imprimible 32..126
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+
+
+def _char_width(ch: str) -> int:
+    code = ord(ch)
+    if 32 <= code <= 126:
+        return _HELVETICA_WIDTHS[code - 32]
+    base = unicodedata.normalize("NFD", ch)[:1]
+    if base and 32 <= ord(base) <= 126:
+        return _HELVETICA_WIDTHS[ord(base) - 32]
+    return 556
+
+
+def _pdf_string(text: str) -> bytes:
+    data = text.encode("cp1252", errors="replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class CompiledPdf:
+    """Plantilla PDF compilada: página A4 con título, campos y cuerpo del reporte.
+
+    Los objetos fijos (catálogo y fuentes) se serializan una sola vez; al renderizar solo
+    se generan las páginas con el texto ya partido en líneas.
+    """
+
+    page_width = 595
+    page_height = 842
+    margin = 72
+    font_size = 11
+    leading = 15
+    title_size = 16
+    fields = [("Nombre", "nombre"), ("Periodo", "periodo")]
+    title = "Reporte de actividades"
+
+    def __init__(self):
+        self.max_width = (self.page_width - 2 * self.margin) * 1000 / self.font_size
+        self.lines_per_page = int((self.page_height - 2 * self.margin) / self.leading)
+        # Objetos 1-4 fijos: catálogo (1), árbol de páginas (2, se escribe al final), fuentes (3, 4)
+        self.fonts = (
+            b"3 0 obj\n<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>\nendobj\n"
+            b"4 0 obj\n<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>\nendobj\n"
+        )
+        self.header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n"
+
+    def _wrap(self, text: str) -> List[str]:
+        lines: List[str] = []
+        for paragraph in text.split("\n"):
+            current, width = "", 0
+            for word in paragraph.split():
+                word_width = sum(_char_width(c) for c in word)
+                space = _char_width(" ") if current else 0
+                if current and width + space + word_width > self.max_width:
+                    lines.append(current)
+                    current, width = word, word_width
+                else:
+                    current = f"{current} {word}" if current else word
+                    width += space + word_width
+            lines.append(current)
+        return lines
+
+    def render(self, campos: Dict[str, str], out_path: str) -> None:
+        header_lines = [(f"{label}: {campos.get(key, '')}", False) for label, key in self.fields]
+        body = [(line, False) for line in self._wrap(campos.get("report", ""))]
+        all_lines = [(self.title, True), ("", False)] + header_lines + [("", False)] + body
+        pages = [all_lines[i:i + self.lines_per_page] for i in range(0, len(all_lines), self.lines_per_page)] or [[]]
+
+        offsets: Dict[int, int] = {}
+        with open(out_path, "wb") as out:
+            out.write(self.header)
+            offsets[1] = self.header.index(b"1 0 obj")
+            pos = len(self.header)
+            offsets[3] = pos
+            offsets[4] = pos + self.fonts.index(b"4 0 obj")
+            out.write(self.fonts)
+            pos += len(self.fonts)
+
+            page_ids = []
+            next_id = 5
+            for page in pages:
+                ops = [b"BT", b"%d TL" % self.leading, b"%d %d Td" % (self.margin, self.page_height - self.margin)]
+                for text, bold in page:
+                    font = b"/F2 %d Tf" % self.title_size if bold else b"/F1 %d Tf" % self.font_size
+                    ops.append(font + b" " + _pdf_string(text) + b" Tj T*")
+                ops.append(b"ET")
+                stream = b"\n".join(ops)
+                content_id, page_id = next_id, next_id + 1
+                next_id += 2
+                content = b"%d 0 obj\n<< /Length %d >>\nstream\n%s\nendstream\nendobj\n" % (content_id, len(stream), stream)
+                page_obj = (
+                    b"%d 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                    b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>\nendobj\n"
+                    % (page_id, self.page_width, self.page_height, content_id)
+                )
+                offsets[content_id] = pos
+                out.write(content)
+                pos += len(content)
+                offsets[page_id] = pos
+                out.write(page_obj)
+                pos += len(page_obj)
+                page_ids.append(page_id)
+
+            kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+            pages_obj = b"2 0 obj\n<< /Type /Pages /Kids [%s] /Count %d >>\nendobj\n" % (kids, len(page_ids))
+            offsets[2] = pos
+            out.write(pages_obj)
+            pos += len(pages_obj)
+
+            xref = [b"xref\n0 %d\n" % next_id, b"0000000000 65535 f \n"]
+            xref += [b"%010d 00000 n \n" % offsets[i] for i in range(1, next_id)]
+            out.write(b"".join(xref))
+            out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (next_id, pos))
+
+
+# Caché de plantillas compiladas por proceso (cada worker del pool mantiene la suya)
+_COMPILED: Dict[Tuple[str, Optional[str], float], Union[CompiledDocx, CompiledPdf]] = {}
+
+
+def _compiled(formato: str, template_path: Optional[str]):
+    mtime = os.path.getmtime(template_path) if template_path else 0.0
+    key = (formato, template_path, mtime)
+    template = _COMPILED.get(key)
+    if template is None:
+        template = CompiledDocx.compile(template_path) if formato == "docx" else CompiledPdf()
+        _COMPILED[key] = template
+    return template
+
+
+def _warmup(docx_template: Optional[str]) -> None:
+    """Inicializador de cada worker: compila las plantillas antes de la primera petición."""
+    _compiled("docx", docx_template)
+    _compiled("pdf", None)
+
+
+def render_to_file(formato: str, template_path: Optional[str], campos: Dict[str, str], tmp_dir: Optional[str]) -> str:
+    """Renderiza en un archivo temporal y devuelve su ruta (se ejecuta en el pool de procesos)."""
+    fd, out_path = tempfile.mkstemp(suffix=f".{formato}", dir=tmp_dir)
+    os.close(fd)
+    try:
+        _compiled(formato, template_path if formato == "docx" else None).render(campos, out_path)
+    except Exception:
+        os.unlink(out_path)
+        raise
+    return out_path
+
+
+def remove_file(path: str) -> None:
+    """Borra un documento temporal; no falla si ya se borró."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def iter_file(path: str, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Lee el documento por bloques y lo borra al terminar o al cerrarse el iterador."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+    finally:
+        remove_file(path)
+
+
+def _discard(future: "asyncio.Future[str]") -> None:
+    if not future.cancelled() and future.exception() is None:
+        remove_file(future.result())
+
+
+class DocumentRenderer:
+    """Pool de procesos para renderizar documentos sin bloquear el event loop."""
+
+    def __init__(self, docx_template: Optional[str], workers: int, tmp_dir: Optional[str] = None):
+        self.docx_template = docx_template or None
+        self.workers = workers
+        self.tmp_dir = tmp_dir or None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warmup,
+                initargs=(self.docx_template,),
+            )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def render(self, formato: str, campos: Dict[str, str]) -> str:
+        """Devuelve la ruta de un archivo temporal con el documento; el llamador debe borrarlo."""
+        if formato not in FORMATS:
+            raise ValueError(f"Formato no soportado: {formato}")
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._pool, render_to_file, formato, self.docx_template, campos, self.tmp_dir
+        )
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # El worker termina igualmente: su archivo se borra en cuanto lo entrega
+            future.add_done_callback(_discard)
+            raise
@@ -0,0 +1,117 @@
+"""Buffer de escritura diferida (write-behind) con lotes y memoria acotada.
+
+Las peticiones solo encolan elementos en memoria; una tarea de fondo los agrupa en
+lotes y los escribe en el almacén fuera del camino de la petición. Un lote sigue
+visible en `pending()` mientras se escribe (reintentos incluidos), hasta que se confirma
+o se descarta. Al apagar la aplicación se vacía lo pendiente.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Deque, Generic, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WriteBehindBuffer(Generic[T]):
+    """Acumula elementos y los escribe en lotes con `flush` (función bloqueante, se ejecuta en un hilo).
+
+    - `batch_size`: elementos máximos por escritura.
+    - `flush_interval`: segundos máximos que un elemento espera antes de escribirse.
+    - `max_pending`: elementos máximos en memoria; al superarse se descartan los nuevos.
+    - `max_retries`: reintentos de un lote fallido antes de descartarlo.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[T]], None],
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        max_pending: int = 1000,
+        max_retries: int = 3,
+        name: str = "write-behind",
+    ):
+        self._flush = flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.name = name
+        self._pending: Deque[T] = deque()
+        # Lote retirado de _pending que aún no se confirmó en el almacén
+        self._writing: List[T] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.dropped = 0
+
+    def add(self, item: T) -> bool:
+        """Encola un elemento sin bloquear. Devuelve False si se descartó por falta de espacio."""
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            logger.warning("%s: buffer lleno (%d), descartando elemento", self.name, self.max_pending)
+            return False
+        self._pending.append(item)
+        if self._wakeup is not None and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def pending(self) -> List[T]:
+        """Copia de los elementos aún no escritos, incluido el lote en curso (para lecturas que deben verlos)."""
+        return [*self._writing, *self._pending]
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        """Detiene la tarea de fondo y escribe todo lo pendiente."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    def _take_batch(self) -> List[T]:
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            batch.append(self._pending.popleft())
+        return batch
+
+    async def _write(self, batch: List[T]) -> None:
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                await asyncio.to_thread(self._flush, batch)
+                return
+            except Exception as e:
+                logger.warning("%s: fallo al escribir lote de %d (intento %d): %s", self.name, len(batch), attempt, e)
+                if attempt < self.max_retries:
+                    await asyncio.sleep(min(2 ** attempt * 0.5, 10))
+        self.dropped += len(batch)
+        logger.error("%s: se descartó un lote de %d elementos tras %d intentos", self.name, len(batch), self.max_retries)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._closing:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+            while self._pending:
+                self._writing = self._take_batch()
+                try:
+                    await self._write(self._writing)
+                finally:
+                    self._writing = []
+                if not self._closing and len(self._pending) < self.batch_size:
+                    break
+
+            if self._closing and not self._pending:
+                return
@@ -0,0 +1,159 @@
+"""Controlador de carga para las llamadas al modelo.
+
+Vigila las llamadas en vuelo, el tiempo de espera en cola para obtener un cupo y la
+latencia reciente del modelo. Cuando se cruzan los umbrales, una fracción configurable
+de las peticiones nuevas se desvía directamente al generador local, en lugar de
+esperar a que el modelo falle o expire.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class OverloadedError(Exception):
+    """Lanzado cuando no se obtiene un cupo para llamar al modelo dentro del tiempo máximo de cola."""
+
+
+class LoadShedder:
+    """Limita la concurrencia hacia el modelo y decide cuándo degradar peticiones.
+
+    - `max_concurrency`: cupos simultáneos hacia el modelo; el resto espera en cola.
+    - `max_queue_wait`: segundos máximos esperando cupo antes de degradar.
+    - `queue_wait_threshold` / `latency_threshold`: medias recientes (segundos) a partir
+      de las cuales se considera que hay sobrecarga.
+    - `shed_fraction`: fracción (0-1) de peticiones nuevas que se degradan en sobrecarga.
+    - `horizon`: segundos durante los que una muestra cuenta para las medias, para que
+      una ráfaga antigua no mantenga el servicio degradado indefinidamente.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        max_queue_wait: float = 2.0,
+        queue_wait_threshold: float = 0.5,
+        latency_threshold: float = 10.0,
+        shed_fraction: float = 0.5,
+        window: int = 50,
+        horizon: float = 30.0,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue_wait = max_queue_wait
+        self.queue_wait_threshold = queue_wait_threshold
+        self.latency_threshold = latency_threshold
+        self.shed_fraction = shed_fraction
+        self.horizon = horizon
+        self._rng = rng
+        self._in_flight = 0
+        self._waiting = 0
+        self._queue_waits: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._latencies: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._cond: Optional[asyncio.Condition] = None
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    def _condition(self) -> asyncio.Condition:
+        # Se crea perezosamente para enlazarse al event loop que realmente lo usa
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def _mean(self, samples: Deque[Tuple[float, float]]) -> float:
+        cutoff = time.monotonic() - self.horizon
+        recent = [value for at, value in samples if at >= cutoff]
+        return sum(recent) / len(recent) if recent else 0.0
+
+    def overloaded(self) -> bool:
+        """True si hay cola, la espera media en cola o la latencia media superan los umbrales."""
+        if self._waiting > 0 and self._in_flight >= self.max_concurrency:
+            return True
+        if self._mean(self._queue_waits) > self.queue_wait_threshold:
+            return True
+        if self._mean(self._latencies) > self.latency_threshold:
+            return True
+        return False
+
+    def should_shed(self) -> bool:
+        """Decide si una petición nueva debe ir directamente al generador local."""
+        if not self.overloaded():
+            return False
+        shed = self._rng() < self.shed_fraction
+        if shed:
+            logger.info(
+                "Sobrecarga (en vuelo=%d, en cola=%d): degradando petición al generador local",
+                self._in_flight, self._waiting,
+            )
+        return shed
+
+    def record_latency(self, seconds: float) -> None:
+        self._latencies.append((time.monotonic(), seconds))
+
+    def _record_queue_wait(self, seconds: float) -> None:
+        self._queue_waits.append((time.monotonic(), seconds))
+
+    def configure(self, **kwargs) -> None:
+        """Actualiza umbrales en caliente y despierta a quienes esperan por si hay más cupos."""
+        for name, value in kwargs.items():
+            if not hasattr(self, name) or name.startswith("_"):
+                raise AttributeError(f"Parámetro desconocido: {name}")
+            setattr(self, name, value)
+        if self._cond is not None:
+            try:
+                asyncio.get_running_loop().create_task(self._notify_all())
+            except RuntimeError:
+                # Sin event loop activo no hay nadie esperando cupo
+                pass
+
+    async def _notify_all(self) -> None:
+        cond = self._condition()
+        async with cond:
+            cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Obtiene un cupo para llamar al modelo y registra espera en cola y latencia.
+
+        Lanza OverloadedError si no hay cupo antes de `max_queue_wait` segundos.
+        """
+        cond = self._condition()
+        queued_at = time.perf_counter()
+        if self._in_flight < self.max_concurrency and self._waiting == 0:
+            # Hay cupo libre y nadie en cola: se toma sin ceder el event loop, así una
+            # cancelación no puede perderse entre la comprobación y la llamada al modelo
+            self._in_flight += 1
+        else:
+            self._waiting += 1
+            try:
+                async with cond:
+                    try:
+                        async with asyncio.timeout(self.max_queue_wait):
+                            await cond.wait_for(lambda: self._in_flight < self.max_concurrency)
+                    except TimeoutError:
+                        self._record_queue_wait(time.perf_counter() - queued_at)
+                        raise OverloadedError() from None
+                    self._in_flight += 1
+            finally:
+                self._waiting -= 1
+
+        started = time.perf_counter()
+        self._record_queue_wait(started - queued_at)
+        try:
+            yield
+        finally:
+            # También cuenta si la llamada falla o expira: un timeout es latencia alta
+            self.record_latency(time.perf_counter() - started)
+            self._in_flight -= 1
+            async with cond:
+                cond.notify()
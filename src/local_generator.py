@@ -0,0 +1,299 @@
+"""Generador local de reportes basado en plantillas.
+
+Se usa cuando no hay clave de IA, cuando el modelo falla y cuando el controlador de
+carga decide degradar una petición. Produce texto en primera persona y tiempo pasado
+sin llamar a ningún servicio externo, por lo que responde en microsegundos.
+"""
+import re
+from typing import List, Optional
+
+# Verbos irregulares frecuentes en listas de actividades (infinitivo -> pretérito, 1a persona)
+_IRREGULARES = {
+    "hacer": "hice",
+    "rehacer": "rehice",
+    "deshacer": "deshice",
+    "ir": "fui",
+    "ser": "fui",
+    "estar": "estuve",
+    "tener": "tuve",
+    "mantener": "mantuve",
+    "obtener": "obtuve",
+    "sostener": "sostuve",
+    "contener": "contuve",
+    "poder": "pude",
+    "poner": "puse",
+    "proponer": "propuse",
+    "disponer": "dispuse",
+    "exponer": "expuse",
+    "componer": "compuse",
+    "decir": "dije",
+    "traer": "traje",
+    "dar": "di",
+    "ver": "vi",
+    "venir": "vine",
+    "intervenir": "intervine",
+    "querer": "quise",
+    "saber": "supe",
+    "caber": "cupe",
+    "andar": "anduve",
+    "conducir": "conduje",
+    "producir": "produje",
+    "reproducir": "reproduje",
+    "traducir": "traduje",
+    "introducir": "introduje",
+    "reducir": "reduje",
+    "deducir": "deduje",
+    "leer": "leí",
+    "creer": "creí",
+    "oír": "oí",
+    "reír": "reí",
+}
+
+# Palabras que terminan como infinitivo pero no son verbos
+_NO_VERBOS = {
+    "taller", "lugar", "hogar", "mujer", "ayer", "collar", "militar", "popular",
+    "particular", "similar", "regular", "escolar", "solar", "familiar", "dólar",
+    "primer", "tercer", "cualquier", "bar", "mar", "par", "sur", "altar", "azúcar",
+    "cráter", "carácter", "líder", "máster", "póster", "súper", "auxiliar",
+    "modular", "celular", "titular", "estelar",
+}
+
+# Pretérito en tercera persona (singular y plural) -> primera persona, para verbos
+# irregulares o con cambio de raíz; el resto se deduce de la terminación.
+_TERCERA_IRREGULARES = {
+    "hizo": "hice", "hicieron": "hice",
+    "rehízo": "rehice", "rehicieron": "rehice",
+    "fue": "fui", "fueron": "fui",
+    "dio": "di", "dieron": "di",
+    "vio": "vi", "vieron": "vi",
+    "tuvo": "tuve", "estuvo": "estuve", "mantuvo": "mantuve", "obtuvo": "obtuve",
+    "sostuvo": "sostuve", "contuvo": "contuve", "anduvo": "anduve",
+    "pudo": "pude", "puso": "puse", "propuso": "propuse", "dispuso": "dispuse",
+    "expuso": "expuse", "compuso": "compuse", "supo": "supe", "quiso": "quise",
+    "vino": "vine", "intervino": "intervine",
+    "dijo": "dije", "trajo": "traje", "condujo": "conduje", "produjo": "produje",
+    "reprodujo": "reproduje", "tradujo": "traduje", "introdujo": "introduje",
+    "redujo": "reduje", "dedujo": "deduje",
+    "pidió": "pedí", "impidió": "impedí", "despidió": "despedí", "midió": "medí",
+    "sirvió": "serví", "siguió": "seguí", "consiguió": "conseguí", "persiguió": "perseguí",
+    "corrigió": "corregí", "eligió": "elegí", "repitió": "repetí", "compitió": "competí",
+    "sintió": "sentí", "prefirió": "preferí", "sugirió": "sugerí", "requirió": "requerí",
+    "invirtió": "invertí", "convirtió": "convertí", "advirtió": "advertí",
+    "durmió": "dormí", "rió": "reí",
+}
+
+# Raíces de verbos en -iar: su pretérito "-ió" es de la primera conjugación (envió -> envié)
+_RAICES_IAR = {
+    "envi", "reenvi", "cambi", "inici", "reinici", "copi", "fotocopi", "estudi", "anunci",
+    "negoci", "diferenci", "financi", "renunci", "ampli", "vari", "confi", "limpi", "asoci",
+    "apreci", "evidenci", "potenci", "vaci", "licenci", "pronunci", "remedi", "concili",
+    "auxili", "denunci", "sentenci",
+}
+
+# Determinantes con los que puede empezar ya un sustantivo
+_DETERMINANTES = {
+    "el", "la", "los", "las", "un", "una", "unos", "unas", "mi", "mis", "su", "sus",
+    "este", "esta", "estos", "estas", "varios", "varias", "diversos", "diversas",
+    "algunos", "algunas", "todo", "toda", "todos", "todas", "otro", "otra", "otros", "otras",
+}
+
+# Sustantivos que nombran eventos: "participé en la reunión" en vez de "trabajé en"
+_EVENTOS = {
+    "reunión", "reuniones", "junta", "juntas", "taller", "talleres", "curso", "cursos",
+    "capacitación", "capacitaciones", "conferencia", "conferencias", "sesión", "sesiones",
+    "seminario", "seminarios", "plática", "pláticas", "clase", "clases", "evento", "eventos",
+    "congreso", "congresos", "webinar", "webinars", "entrevista", "entrevistas",
+}
+
+# Excepciones al género que sugiere la terminación
+_FEMENINOS = {"clase", "base", "red", "parte", "fase", "llave", "tarde", "noche", "gente", "calle", "nube", "mano", "foto", "imagen"}
+_MASCULINOS = {
+    "problema", "sistema", "programa", "tema", "esquema", "diagrama", "día", "mapa",
+    "idioma", "dilema", "clima", "sofá", "avión", "camión",
+}
+
+_CONECTORES = ["Posteriormente, ", "Además, ", "Asimismo, ", "También "]
+_CIERRE = "En conjunto, estas actividades me permitieron cumplir con los objetivos planteados."
+
+
+def _conjugar_infinitivo(palabra: str) -> Optional[str]:
+    """Conjuga un infinitivo a pretérito en primera persona. Devuelve None si no es infinitivo."""
+    base = palabra.lower()
+    reflexivo = False
+    if len(base) > 4 and base.endswith("se") and base[:-2].endswith(("ar", "er", "ir", "ír")):
+        base = base[:-2]
+        reflexivo = True
+
+    if base in _NO_VERBOS or len(base) < 2:
+        return None
+    if base in _IRREGULARES:
+        forma = _IRREGULARES[base]
+    elif len(base) < 4:
+        return None
+    elif base.endswith("car"):
+        forma = base[:-3] + "qué"
+    elif base.endswith("gar"):
+        forma = base[:-3] + "gué"
+    elif base.endswith("zar"):
+        forma = base[:-3] + "cé"
+    elif base.endswith("ar"):
+        forma = base[:-2] + "é"
+    elif base.endswith(("er", "ir")):
+        forma = base[:-2] + "í"
+    else:
+        return None
+
+    return f"me {forma}" if reflexivo else forma
+
+
+def _preterito_ar(raiz: str) -> str:
+    """Pretérito en primera persona de un verbo en -ar a partir de su raíz (realiz -> realicé)."""
+    if raiz.endswith("c"):
+        return raiz[:-1] + "qué"
+    if raiz.endswith("g"):
+        return raiz[:-1] + "gué"
+    if raiz.endswith("z"):
+        return raiz[:-1] + "cé"
+    return raiz + "é"
+
+
+def _tercera_a_primera(palabra: str) -> Optional[str]:
+    """Pasa un pretérito en tercera persona (realizó, realizaron) a primera (realicé).
+
+    Devuelve None si la palabra no tiene forma de pretérito en tercera persona.
+    """
+    w = palabra.lower()
+    if w in _TERCERA_IRREGULARES:
+        return _TERCERA_IRREGULARES[w]
+    if len(w) < 4:
+        return None
+    # Plural: se reduce al singular y se aplican las mismas reglas
+    if w.endswith("aron") and len(w) > 5:
+        return _preterito_ar(w[:-4])
+    if w.endswith("yeron"):
+        return w[:-5] + "í"
+    if w.endswith("ieron"):
+        base = w[:-5]
+        return _TERCERA_IRREGULARES.get(base + "o") or _TERCERA_IRREGULARES.get(base + "ió") or base + "í"
+    if w.endswith("eron"):
+        return _TERCERA_IRREGULARES.get(w[:-4] + "o")
+    # Singular
+    if w.endswith("yó"):
+        return w[:-2] + "í"
+    if w.endswith("ió"):
+        if w[:-1] in _RAICES_IAR:
+            return _preterito_ar(w[:-1])
+        return w[:-2] + "í"
+    if w.endswith("ó"):
+        return _preterito_ar(w[:-1])
+    return None
+
+
+def _articulo(sustantivo: str) -> str:
+    """Artículo definido para un sustantivo según su terminación (heurística)."""
+    w = sustantivo.lower()
+    plural = len(w) > 3 and w.endswith("s") and not w.endswith(("is", "us"))
+    singular = w
+    if plural:
+        singular = w[:-2] if w.endswith("es") and w[-3] not in "aeiouáéíóú" else w[:-1]
+    if singular in _FEMENINOS:
+        femenino = True
+    elif singular in _MASCULINOS:
+        femenino = False
+    else:
+        femenino = singular.endswith(("a", "ción", "sión", "ión", "cion", "sion", "ion", "dad", "tad", "tud", "umbre", "ie"))
+    if plural:
+        return "las" if femenino else "los"
+    return "la" if femenino else "el"
+
+
+def _minuscula_inicial(texto: str) -> str:
+    """Pone en minúscula la primera letra salvo que la palabra sea una sigla (API, SQL)."""
+    primera = texto.split(" ", 1)[0]
+    if len(primera) > 1 and primera.isupper():
+        return texto
+    return texto[0].lower() + texto[1:]
+
+
+def _a_primera_persona(actividad: str) -> str:
+    """Convierte una actividad en una cláusula en primera persona y tiempo pasado (sin punto final)."""
+    texto = " ".join(actividad.split()).rstrip(" .;,")
+    if not texto:
+        return ""
+
+    primera, _, resto = texto.partition(" ")
+    palabra = re.sub(r"[^\wáéíóúüñÁÉÍÓÚÜÑ]", "", primera)
+    minuscula = palabra.lower()
+
+    # Forma impersonal o pasiva refleja: "Se realizó limpieza" -> "realicé limpieza"
+    if minuscula == "se":
+        segunda, _, cola = resto.partition(" ")
+        objeto = ""
+        if segunda.lower() in ("le", "les"):
+            objeto = segunda.lower() + " "
+            segunda, _, cola = cola.partition(" ")
+        conjugado = _tercera_a_primera(re.sub(r"[^\wáéíóúüñÁÉÍÓÚÜÑ]", "", segunda))
+        if conjugado:
+            return f"{objeto}{conjugado} {cola}".strip()
+        # Otro tiempo verbal ("Se revisa..."): ya es una cláusula completa
+        return _minuscula_inicial(texto)
+
+    # Ya está en pretérito de primera persona ("Desarrollé", "Asistí", "Me reuní")
+    if minuscula.endswith(("é", "í")) or minuscula == "me":
+        return _minuscula_inicial(texto)
+
+    conjugado = _conjugar_infinitivo(minuscula) or _tercera_a_primera(minuscula)
+    if conjugado:
+        return f"{conjugado} {resto}".strip()
+
+    # Gerundio ("Revisando el código") o primera persona del plural ("Revisamos"):
+    # ya hay un verbo conjugable, no se envuelve
+    if minuscula.endswith(("ando", "iendo", "yendo")) and len(minuscula) > 5:
+        return "estuve " + _minuscula_inicial(texto)
+    if minuscula.endswith(("amos", "emos", "imos")) and len(minuscula) > 5:
+        return _minuscula_inicial(texto)
+
+    # Sustantivo: envolver con un verbo genérico y su artículo
+    verbo = "participé en" if minuscula in _EVENTOS else "trabajé en"
+    if minuscula in _DETERMINANTES or palabra.isdigit():
+        return f"{verbo} {_minuscula_inicial(texto)}"
+    return f"{verbo} {_articulo(palabra)} {_minuscula_inicial(texto)}"
+
+
+def generate_local_report(actividades: List[str], max_chars: int) -> str:
+    """Construye un párrafo en primera persona y tiempo pasado de longitud <= max_chars.
+
+    Cada actividad se convierte en una oración enlazada con conectores. Se añaden
+    oraciones completas mientras quepan, de modo que nunca se corta a mitad de frase
+    (salvo que una sola oración supere el límite).
+    """
+    clausulas = [c for c in (_a_primera_persona(a) for a in actividades) if c]
+    if not clausulas:
+        return ""
+
+    oraciones = ["Durante este periodo " + clausulas[0] + "."]
+    for i, clausula in enumerate(clausulas[1:], start=1):
+        if i == len(clausulas) - 1 and len(clausulas) > 2:
+            conector = "Finalmente, "
+        else:
+            conector = _CONECTORES[(i - 1) % len(_CONECTORES)]
+        oraciones.append(conector + clausula + ".")
+
+    parrafo = ""
+    for oracion in oraciones:
+        candidato = f"{parrafo} {oracion}".strip()
+        if len(candidato) > max_chars:
+            break
+        parrafo = candidato
+
+    if not parrafo:
+        # La primera oración ya excede el límite: recorte limpio por palabra
+        truncated = oraciones[0][:max_chars]
+        last_space = truncated.rfind(" ")
+        if last_space > 0:
+            truncated = truncated[:last_space].rstrip(" ,;")
+        return truncated
+
+    if len(parrafo) + 1 + len(_CIERRE) <= max_chars and len(oraciones) > 1:
+        parrafo = f"{parrafo} {_CIERRE}"
+    return parrafo
@@ -1,11 +1,35 @@
+from contextlib import asynccontextmanager
+
 import yaml
 from fastapi import FastAPI
 from fastapi.responses import Response
 from starlette.middleware.cors import CORSMiddleware
 
-from .infrastructure.api.routers import reports, auth
+from .config import settings
+from .infrastructure.api.routers import reports, reports_ws, auth, admin, usage
+from .runtime_config import runtime_config
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Tareas de fondo: escritura diferida del historial (se vacía al apagar)
+    await reports.report_history_service.start()
+    # Registro de uso: agregados en memoria volcados por lotes (se vacía al apagar)
+    await usage.usage_service.start()
+    # Pool de procesos para DOCX/PDF: arranca con las plantillas ya compiladas
+    reports.document_renderer.start()
+    # Recarga en caliente de RUNTIME_CONFIG_FILE (si está definido)
+    runtime_config.start_watcher(settings.runtime_config_file)
+    try:
+        yield
+    finally:
+        await runtime_config.stop_watcher()
+        reports.document_renderer.shutdown()
+        await reports.report_history_service.stop()
+        await usage.usage_service.stop()
+
 
-app = FastAPI(title="API Reportes IA")
+app = FastAPI(title="API Reportes IA", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,7 +39,10 @@ app.add_middleware(
     allow_headers=["*"],  # O lista de headers permitidos
 )
 app.include_router(reports.router)
+app.include_router(reports_ws.router)
 app.include_router(auth.router)
+app.include_router(admin.router)
+app.include_router(usage.router)
 
 @app.get("/openapi.yaml", tags=["Documentacion"])
 def get_openapi_yaml():
@@ -0,0 +1,232 @@
+"""Configuración de rendimiento recargable en caliente.
+
+`RuntimeSettings` agrupa los parámetros de ajuste (timeouts, concurrencia, tamaños y TTL
+de cachés, modelo, MAX_CHARS) con validación de tipos y rangos. Los valores iniciales
+salen de las variables de entorno; después pueden cambiarse sin reiniciar desde
+`PATCH /admin/config` o editando el archivo JSON de `RUNTIME_CONFIG_FILE`.
+
+Cada cambio valida una instantánea completa y la sustituye de una vez (un solo cambio de
+referencia). Los componentes leen `runtime_config.current` al empezar cada petición y
+los que guardan estado (controlador de carga, servicios) se actualizan en callbacks
+síncronos, sin ceder el event loop, así que ninguna petición ve una mezcla de valores.
+Todos los cambios quedan registrados en el log de auditoría.
+
+Si se usan las dos fuentes, gana la última que cambió cada campo: al recargar el archivo
+solo se aplican los campos cuyo valor cambió en él, y los que se fijaron por API y el
+archivo no tocó se conservan.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Variable de entorno de la que sale el valor inicial de cada campo
+_ENV_VARS = {
+    "gemini_model": "GEMINI_MODEL",
+    "genai_timeout": "GENAI_TIMEOUT",
+    "max_chars": "MAX_CHARS",
+    "genai_max_concurrency": "GENAI_MAX_CONCURRENCY",
+    "genai_max_queue_wait": "GENAI_MAX_QUEUE_WAIT",
+    "genai_shed_queue_wait": "GENAI_SHED_QUEUE_WAIT",
+    "genai_shed_latency": "GENAI_SHED_LATENCY",
+    "genai_shed_fraction": "GENAI_SHED_FRACTION",
+    "map_reduce_threshold_tokens": "GENAI_MAP_REDUCE_THRESHOLD_TOKENS",
+    "map_chunk_tokens": "GENAI_MAP_CHUNK_TOKENS",
+    "map_concurrency": "GENAI_MAP_CONCURRENCY",
+    "idempotency_ttl": "IDEMPOTENCY_TTL",
+    "idempotency_wait_timeout": "IDEMPOTENCY_WAIT_TIMEOUT",
+    "idempotency_reservation_ttl": "IDEMPOTENCY_RESERVATION_TTL",
+    "report_history_batch_size": "REPORT_HISTORY_BATCH_SIZE",
+    "report_history_flush_interval": "REPORT_HISTORY_FLUSH_INTERVAL",
+    "report_history_max_pending": "REPORT_HISTORY_MAX_PENDING",
+    "draft_debounce": "DRAFT_DEBOUNCE",
+    "draft_ttl": "DRAFT_TTL",
+    "draft_max_per_hour": "DRAFT_MAX_PER_HOUR",
+    "draft_max_concurrent": "DRAFT_MAX_CONCURRENT",
+    "bulk_signup_concurrency": "BULK_SIGNUP_CONCURRENCY",
+    "usage_flush_interval": "USAGE_FLUSH_INTERVAL",
+    "usage_batch_size": "USAGE_BATCH_SIZE",
+}
+
+
+class RuntimeSettings(BaseModel):
+    """Parámetros de rendimiento ajustables en caliente."""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    gemini_model: str = Field(
+        "googleai/gemini-2.5-flash",
+        pattern=r"^googleai/[A-Za-z0-9][A-Za-z0-9._-]*$",
+        description="Modelo de Gemini (googleai/<nombre>)",
+    )
+    genai_timeout: float = Field(20, gt=0, le=300, description="Timeout de la llamada a la IA (s)")
+    max_chars: int = Field(1245, ge=200, le=20000, description="Longitud máxima del reporte")
+    genai_max_concurrency: int = Field(16, ge=1, le=1000, description="Llamadas simultáneas al modelo")
+    genai_max_queue_wait: float = Field(2, ge=0, le=120, description="Espera máxima por un cupo (s)")
+    genai_shed_queue_wait: float = Field(0.5, ge=0, le=120, description="Espera media en cola que activa la degradación (s)")
+    genai_shed_latency: float = Field(10, gt=0, le=600, description="Latencia media que activa la degradación (s)")
+    genai_shed_fraction: float = Field(0.5, ge=0, le=1, description="Fracción degradada en sobrecarga")
+    map_reduce_threshold_tokens: int = Field(4000, ge=100, le=1_000_000, description="Umbral de map-reduce (tokens)")
+    map_chunk_tokens: int = Field(1500, ge=50, le=100_000, description="Tokens por bloque en la fase map")
+    map_concurrency: int = Field(4, ge=1, le=64, description="Bloques en paralelo por petición")
+    idempotency_ttl: float = Field(86400, gt=0, le=30 * 86400, description="Vigencia de respuestas idempotentes (s)")
+    idempotency_wait_timeout: float = Field(90, gt=0, le=600, description="Espera máxima de duplicados (s)")
+    idempotency_reservation_ttl: float = Field(
+        60, ge=5, le=3600, description="Vigencia de una reserva en curso; se renueva mientras se genera (s)"
+    )
+    report_history_batch_size: int = Field(50, ge=1, le=1000, description="Reportes por lote de escritura")
+    report_history_flush_interval: float = Field(2, gt=0, le=300, description="Espera máxima antes de escribir (s)")
+    report_history_max_pending: int = Field(1000, ge=1, le=1_000_000, description="Reportes pendientes en memoria")
+    draft_debounce: float = Field(1.5, ge=0, le=60, description="Debounce de borradores (s)")
+    draft_ttl: float = Field(300, gt=0, le=86400, description="Vigencia de un borrador (s)")
+    draft_max_per_hour: int = Field(20, ge=0, le=10000, description="Borradores por usuario y hora")
+    draft_max_concurrent: int = Field(8, ge=0, le=1000, description="Borradores generándose a la vez")
+    bulk_signup_concurrency: int = Field(8, ge=1, le=100, description="Altas simultáneas en el alta masiva")
+    usage_flush_interval: float = Field(30, gt=0, le=3600, description="Segundos entre volcados del registro de uso")
+    usage_batch_size: int = Field(500, ge=1, le=10000, description="Filas de uso por escritura")
+
+    @classmethod
+    def from_env(cls) -> "RuntimeSettings":
+        values = {field: os.environ[env] for field, env in _ENV_VARS.items() if os.getenv(env)}
+        return cls.model_validate(values)
+
+
+class ConfigAuditEntry(BaseModel):
+    """Registro de un cambio de configuración."""
+    at: str = Field(..., description="Fecha del cambio (ISO 8601, UTC)")
+    actor: str = Field(..., description="Quién hizo el cambio (email del admin o archivo)")
+    source: str = Field(..., description="api o file")
+    changes: Dict[str, List[Any]] = Field(..., description="Campo -> [valor anterior, valor nuevo]")
+
+
+class RuntimeConfig:
+    """Contenedor de la configuración vigente, con suscriptores y auditoría."""
+
+    def __init__(self, initial: RuntimeSettings, audit_log_path: Optional[str] = None, audit_history: int = 200):
+        self._current = initial
+        self._defaults = initial
+        # Último contenido del archivo y campos fijados por API que el archivo aún no pisó
+        self._file_values: Dict[str, Any] = {}
+        self._overrides: Dict[str, Any] = {}
+        self._audit_log_path = audit_log_path or None
+        self._audit: Deque[ConfigAuditEntry] = deque(maxlen=audit_history)
+        self._subscribers: List[Callable[[RuntimeSettings], None]] = []
+        self._lock = threading.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+
+    @property
+    def current(self) -> RuntimeSettings:
+        return self._current
+
+    def subscribe(self, callback: Callable[[RuntimeSettings], None]) -> None:
+        """Registra un callback que se llama con cada nueva configuración (y una vez al registrarse)."""
+        self._subscribers.append(callback)
+        callback(self._current)
+
+    def audit_log(self) -> List[ConfigAuditEntry]:
+        return list(self._audit)
+
+    def update(self, changes: Dict[str, Any], actor: str, source: str = "api") -> RuntimeSettings:
+        """Valida y aplica un cambio parcial. Lanza pydantic.ValidationError si no es válido."""
+        new = self._apply({**self._current.model_dump(), **changes}, actor, source)
+        self._overrides.update(changes)
+        return new
+
+    def replace(self, values: Dict[str, Any], actor: str, source: str = "file") -> RuntimeSettings:
+        """Aplica una configuración completa sobre los valores iniciales (los de entorno).
+
+        Los campos fijados por API se mantienen salvo que `values` cambie ese campo respecto
+        a la versión anterior del archivo.
+        """
+        changed = {
+            name for name in {*values, *self._file_values}
+            if name not in values or name not in self._file_values or values[name] != self._file_values[name]
+        }
+        overrides = {name: value for name, value in self._overrides.items() if name not in changed}
+        new = self._apply({**self._defaults.model_dump(), **values, **overrides}, actor, source)
+        self._file_values = dict(values)
+        self._overrides = overrides
+        return new
+
+    def _apply(self, values: Dict[str, Any], actor: str, source: str) -> RuntimeSettings:
+        with self._lock:
+            new = RuntimeSettings.model_validate(values)
+            old = self._current
+            diff = {
+                name: [getattr(old, name), getattr(new, name)]
+                for name in RuntimeSettings.model_fields
+                if getattr(old, name) != getattr(new, name)
+            }
+            if not diff:
+                return old
+            self._current = new
+            self._record(ConfigAuditEntry(
+                at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                actor=actor,
+                source=source,
+                changes=diff,
+            ))
+        for callback in self._subscribers:
+            try:
+                callback(new)
+            except Exception:
+                logger.exception("Error aplicando configuración en %r", callback)
+        return new
+
+    def _record(self, entry: ConfigAuditEntry) -> None:
+        self._audit.append(entry)
+        logger.info("Configuración actualizada por %s (%s): %s", entry.actor, entry.source, entry.changes)
+        if self._audit_log_path:
+            try:
+                with open(self._audit_log_path, "a", encoding="utf-8") as f:
+                    f.write(entry.model_dump_json() + "\n")
+            except OSError as e:
+                logger.warning("No se pudo escribir el log de auditoría de configuración: %s", e)
+
+    def load_file(self, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            values = json.load(f)
+        if not isinstance(values, dict):
+            raise ValueError("El archivo de configuración debe contener un objeto JSON")
+        self.replace(values, actor=f"file:{path}", source="file")
+
+    async def _watch(self, path: str, interval: float) -> None:
+        last_mtime = None
+        while True:
+            try:
+                mtime = os.path.getmtime(path)
+                if mtime != last_mtime:
+                    last_mtime = mtime
+                    self.load_file(path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                # Un archivo inválido no cambia nada: se mantiene la configuración vigente
+                logger.error("Configuración en %s inválida, se ignora: %s", path, e)
+            await asyncio.sleep(interval)
+
+    def start_watcher(self, path: Optional[str], interval: float = 5.0) -> None:
+        if path and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch(path, interval), name="runtime-config-watcher")
+
+    async def stop_watcher(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+
+runtime_config = RuntimeConfig(RuntimeSettings.from_env(), settings.runtime_config_audit_log)
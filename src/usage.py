@@ -0,0 +1,234 @@
+"""Registro de uso del modelo por usuario, cliente y hora.
+
+`generar_reporte` mide cada reporte (tokens de entrada y salida que informa el modelo,
+latencia y si se usó el generador local) y lo suma en memoria. El camino caliente no usa
+locks: solo se llama desde el event loop y actualiza los contadores sin ceder el control.
+Una tarea de fondo intercambia el diccionario de agregados por uno vacío y escribe las
+filas por lotes; si la escritura falla, se vuelven a sumar para el siguiente intento.
+Cada escritura y la retirada de su lote de lo pendiente ocurren bajo el mismo lock que
+`snapshot`, así una lectura nunca ve un lote en el almacén y también en memoria.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from src.domain.models import UsageRecord
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS_USER = "anonymous"
+DEFAULT_CLIENT = "api"
+MAX_CLIENT_LENGTH = 64
+
+# (user_id, client) al que se atribuye el uso de la tarea actual y de las que cree
+_scope: ContextVar[Tuple[str, str]] = ContextVar("usage_scope", default=(ANONYMOUS_USER, DEFAULT_CLIENT))
+# Medición en curso; las subtareas (map-reduce) comparten el mismo objeto
+_current: ContextVar[Optional["UsageSample"]] = ContextVar("usage_sample", default=None)
+
+
+def bind(user_id: str, client: Optional[str] = None) -> None:
+    """Atribuye el uso de la petición actual a un usuario y un sistema cliente."""
+    client = (client or "").strip()[:MAX_CLIENT_LENGTH] or DEFAULT_CLIENT
+    _scope.set((user_id, client))
+
+
+@dataclass
+class UsageSample:
+    """Uso de un reporte (puede incluir varias llamadas al modelo)."""
+    model: str
+    started_at: float = field(default_factory=time.time)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    fallback: bool = False
+    failed: bool = False
+
+
+def _token_count(usage: Any, *names: str) -> int:
+    for name in names:
+        value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        if value:
+            return int(value)
+    return 0
+
+
+def record_model_call(raw: Any) -> None:
+    """Suma a la medición en curso los tokens que informa una respuesta de ai.generate()."""
+    sample = _current.get()
+    usage = getattr(raw, "usage", None)
+    if sample is None or usage is None:
+        return
+    sample.input_tokens += _token_count(usage, "input_tokens", "inputTokens")
+    sample.output_tokens += _token_count(usage, "output_tokens", "outputTokens")
+
+
+# user_id, client, hora (epoch // 3600), modelo
+_Key = Tuple[str, str, int, str]
+
+
+@dataclass
+class _Bucket:
+    requests: int = 0
+    fallbacks: int = 0
+    errors: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_ms_total: int = 0
+    latency_ms_max: int = 0
+
+    def merge(self, other: "_Bucket") -> None:
+        self.requests += other.requests
+        self.fallbacks += other.fallbacks
+        self.errors += other.errors
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.latency_ms_total += other.latency_ms_total
+        self.latency_ms_max = max(self.latency_ms_max, other.latency_ms_max)
+
+
+def hour_iso(hour: int) -> str:
+    return datetime.fromtimestamp(hour * 3600, timezone.utc).isoformat()
+
+
+def _to_record(key: _Key, bucket: _Bucket) -> UsageRecord:
+    user_id, client, hour, model = key
+    return UsageRecord(
+        user_id=user_id,
+        client=client,
+        hour=hour_iso(hour),
+        model=model,
+        requests=bucket.requests,
+        fallbacks=bucket.fallbacks,
+        errors=bucket.errors,
+        input_tokens=bucket.input_tokens,
+        output_tokens=bucket.output_tokens,
+        latency_ms_total=bucket.latency_ms_total,
+        latency_ms_max=bucket.latency_ms_max,
+    )
+
+
+class UsageLedger:
+    """Agregados de uso en memoria con volcado periódico por lotes.
+
+    - `flush_interval`: segundos entre volcados.
+    - `batch_size`: filas por escritura.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 30.0, max_retries: int = 3):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._buckets: Dict[_Key, _Bucket] = {}
+        # Filas ya retiradas de _buckets que aún no se escribieron (siguen visibles en pending)
+        self._flushing: List[Tuple[_Key, _Bucket]] = []
+        self._write_lock = asyncio.Lock()
+        self._flush: Optional[Callable[[List[UsageRecord]], None]] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @asynccontextmanager
+    async def measure(self, model: str) -> AsyncIterator[UsageSample]:
+        """Mide un reporte: las llamadas al modelo dentro del bloque suman sus tokens."""
+        sample = UsageSample(model=model)
+        token = _current.set(sample)
+        start = time.perf_counter()
+        try:
+            yield sample
+        except Exception:
+            sample.failed = True
+            raise
+        finally:
+            _current.reset(token)
+            self.record(sample, time.perf_counter() - start)
+
+    def record(self, sample: UsageSample, latency: float) -> None:
+        user_id, client = _scope.get()
+        key = (user_id, client, int(sample.started_at // 3600), sample.model)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+        latency_ms = int(latency * 1000)
+        bucket.requests += 1
+        bucket.fallbacks += sample.fallback
+        bucket.errors += sample.failed
+        bucket.input_tokens += sample.input_tokens
+        bucket.output_tokens += sample.output_tokens
+        bucket.latency_ms_total += latency_ms
+        if latency_ms > bucket.latency_ms_max:
+            bucket.latency_ms_max = latency_ms
+
+    def pending(self) -> List[UsageRecord]:
+        """Uso aún no escrito en el almacén (para lecturas que deben verlo)."""
+        return [_to_record(k, b) for k, b in [*self._flushing, *self._buckets.items()]]
+
+    async def snapshot(self, read: Callable[[], List[UsageRecord]]) -> Tuple[List[UsageRecord], List[UsageRecord]]:
+        """Lee el almacén con `read` y lo pendiente sin que se escriba un lote entre medias."""
+        async with self._write_lock:
+            stored = await asyncio.to_thread(read)
+            return stored, self.pending()
+
+    async def start(self, flush: Callable[[List[UsageRecord]], None]) -> None:
+        if self._task is None:
+            self._flush = flush
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="usage-ledger")
+
+    async def stop(self) -> None:
+        """Detiene la tarea de fondo y escribe lo pendiente."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        if self._buckets:
+            logger.error("usage-ledger: se descartan %d filas sin escribir", len(self._buckets))
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+        # Lo registrado durante el último volcado
+        await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buckets or self._flush is None:
+            return
+        items, self._buckets = list(self._buckets.items()), {}
+        self._flushing = items
+        try:
+            for i in range(0, len(items), self.batch_size):
+                batch = items[i:i + self.batch_size]
+                if not await self._write([_to_record(k, b) for k, b in batch], items[i + self.batch_size:]):
+                    # Se vuelven a sumar a los agregados para el siguiente volcado
+                    for key, bucket in items[i:]:
+                        self._buckets.setdefault(key, _Bucket()).merge(bucket)
+                    return
+        finally:
+            self._flushing = []
+
+    async def _write(self, batch: List[UsageRecord], rest: List[Tuple[_Key, _Bucket]]) -> bool:
+        """Escribe un lote; si se escribe, `rest` pasa a ser lo pendiente de este volcado."""
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with self._write_lock:
+                    await asyncio.to_thread(self._flush, batch)
+                    self._flushing = rest
+                return True
+            except Exception as e:
+                logger.warning("usage-ledger: fallo al escribir lote de %d (intento %d): %s", len(batch), attempt, e)
+                if attempt < self.max_retries:
+                    await asyncio.sleep(min(2 ** attempt * 0.5, 10))
+        return False
+
+
+usage_ledger = UsageLedger()
@@ -0,0 +1,185 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+# Configuración mínima para importar los routers sin servicios externos
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("REPORT_HISTORY_STORE", "sqlite")
+os.environ.setdefault("REPORT_HISTORY_SQLITE_PATH", ":memory:")
+os.environ.setdefault("PERIOD_SUMMARY_STORE", "memory")
+
+from fastapi import HTTPException, Response  # noqa: E402
+
+from src.application.services import IdempotencyService  # noqa: E402
+from src.domain.errors import IdempotencyKeyReuseError  # noqa: E402
+from src.domain.models import ReportRequest, ReportResponse, User  # noqa: E402
+from src.infrastructure.api.repositories.idempotency_repository import (  # noqa: E402
+    InMemoryIdempotencyRepository,
+    SQLiteIdempotencyRepository,
+)
+from src.infrastructure.api.routers import reports  # noqa: E402
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteIdempotencyRepository(str(tmp_path / "idempotency.sqlite3"))
+    return InMemoryIdempotencyRepository()
+
+
+def _service(repository, **kwargs):
+    kwargs.setdefault("reservation_ttl", 60.0)
+    return IdempotencyService(repository, ttl=60.0, wait_timeout=5.0, poll_interval=0.05, **kwargs)
+
+
+class Producer:
+    """Operación de prueba que cuenta cuántas veces se ejecuta."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self) -> ReportResponse:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("fallo del modelo")
+        return ReportResponse(report=f"reporte {self.calls}")
+
+
+PAYLOAD = ReportRequest(actividades=["Revisé el código"])
+
+
+def test_replay_returns_stored_response(repository):
+    service = _service(repository)
+    producer = Producer()
+
+    async def run():
+        first = await service.run("u1", "k1", PAYLOAD, producer, ReportResponse)
+        second = await service.run("u1", "k1", PAYLOAD, producer, ReportResponse)
+        return first, second
+
+    (first, replayed_first), (second, replayed_second) = asyncio.run(run())
+    assert producer.calls == 1
+    assert (replayed_first, replayed_second) == (False, True)
+    assert second == first
+
+
+def test_concurrent_duplicate_waits_for_original(repository):
+    service = _service(repository)
+    producer = Producer(delay=0.2)
+
+    async def run():
+        return await asyncio.gather(
+            service.run("u1", "k1", PAYLOAD, producer, ReportResponse),
+            service.run("u1", "k1", PAYLOAD, producer, ReportResponse),
+        )
+
+    (first, replayed_first), (second, replayed_second) = asyncio.run(run())
+    assert producer.calls == 1
+    assert sorted([replayed_first, replayed_second]) == [False, True]
+    assert first == second
+
+
+def test_key_reuse_with_other_body_is_rejected(repository):
+    service = _service(repository)
+    other = ReportRequest(actividades=["Otra actividad"])
+
+    async def run():
+        await service.run("u1", "k1", PAYLOAD, Producer(), ReportResponse)
+        await service.run("u1", "k1", other, Producer(), ReportResponse)
+
+    with pytest.raises(IdempotencyKeyReuseError):
+        asyncio.run(run())
+
+
+def test_same_key_is_independent_per_user(repository):
+    service = _service(repository)
+    producer = Producer()
+
+    async def run():
+        await service.run("u1", "k1", PAYLOAD, producer, ReportResponse)
+        return await service.run("u2", "k1", PAYLOAD, producer, ReportResponse)
+
+    _, replayed = asyncio.run(run())
+    assert replayed is False
+    assert producer.calls == 2
+
+
+def test_failure_releases_key(repository):
+    service = _service(repository)
+    failing = Producer(fail=True)
+    producer = Producer()
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await service.run("u1", "k1", PAYLOAD, failing, ReportResponse)
+        return await service.run("u1", "k1", PAYLOAD, producer, ReportResponse)
+
+    response, replayed = asyncio.run(run())
+    assert replayed is False
+    assert producer.calls == 1
+    assert response.report == "reporte 1"
+
+
+def test_cancellation_releases_key(repository):
+    service = _service(repository)
+    slow = Producer(delay=10)
+    producer = Producer()
+
+    async def run():
+        task = asyncio.create_task(service.run("u1", "k1", PAYLOAD, slow, ReportResponse))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await service.run("u1", "k1", PAYLOAD, producer, ReportResponse)
+
+    _, replayed = asyncio.run(run())
+    assert replayed is False
+    assert producer.calls == 1
+
+
+def test_reservation_is_renewed_while_running(repository):
+    # La generación dura más que la reserva: sin renovación el duplicado la ejecutaría de nuevo
+    service = _service(repository, reservation_ttl=0.3)
+    producer = Producer(delay=1.0)
+
+    async def run():
+        original = asyncio.create_task(service.run("u1", "k1", PAYLOAD, producer, ReportResponse))
+        await asyncio.sleep(0.05)
+        duplicate = await service.run("u1", "k1", PAYLOAD, producer, ReportResponse)
+        return await original, duplicate
+
+    (first, _), (second, replayed) = asyncio.run(run())
+    assert producer.calls == 1
+    assert replayed is True
+    assert second == first
+
+
+def test_router_maps_key_reuse_to_422(monkeypatch, repository):
+    class FakeReportService:
+        async def create_report(self, data, user):
+            return ReportResponse(report="reporte")
+
+    monkeypatch.setattr(reports, "report_service", FakeReportService())
+    monkeypatch.setattr(reports, "idempotency_service", _service(repository))
+    user = User(id="u1", email="u1@ejemplo.com")
+
+    async def run():
+        first = Response()
+        await reports.crear_reporte(PAYLOAD, first, user, idempotency_key="k1")
+        replay = Response()
+        await reports.crear_reporte(PAYLOAD, replay, user, idempotency_key="k1")
+        assert replay.headers.get("Idempotent-Replayed") == "true"
+        await reports.crear_reporte(ReportRequest(actividades=["Otra"]), Response(), user, idempotency_key="k1")
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(run())
+    assert excinfo.value.status_code == 422
@@ -0,0 +1,33 @@
+import pytest
+
+from src.local_generator import _a_primera_persona, generate_local_report
+
+
+@pytest.mark.parametrize(
+    "actividad, esperado",
+    [
+        ("Se realizó limpieza del laboratorio", "realicé limpieza del laboratorio"),
+        ("Se realizaron pruebas unitarias", "realicé pruebas unitarias"),
+        ("Se envió el informe", "envié el informe"),
+        ("Se corrigieron errores", "corregí errores"),
+        ("Se les dio capacitación", "les di capacitación"),
+        ("Se revisa el código", "se revisa el código"),
+        ("Realizó respaldo de la base de datos", "realicé respaldo de la base de datos"),
+        ("Reunión con el equipo", "participé en la reunión con el equipo"),
+        ("Mantenimiento de servidores", "trabajé en el mantenimiento de servidores"),
+        ("Pruebas de carga", "trabajé en las pruebas de carga"),
+        ("Revisar el código", "revisé el código"),
+        ("Desarrollé el módulo", "desarrollé el módulo"),
+        ("Revisando el código", "estuve revisando el código"),
+        ("API de reportes", "trabajé en el API de reportes"),
+    ],
+)
+def test_actividad_en_primera_persona(actividad, esperado):
+    assert _a_primera_persona(actividad) == esperado
+
+
+def test_reporte_no_envuelve_formas_conjugadas():
+    reporte = generate_local_report(["Se realizó limpieza del laboratorio", "Reunión con el equipo"], 500)
+    assert "trabajé en se" not in reporte
+    assert "trabajé en reunión" not in reporte
+    assert reporte.startswith("Durante este periodo realicé limpieza del laboratorio.")
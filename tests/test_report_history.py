@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+# Configuración mínima para importar los servicios sin servicios externos
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+
+from src.application.services import ReportHistoryService  # noqa: E402
+from src.domain.errors import InvalidCursorError  # noqa: E402
+from src.domain.models import ReportHistoryEntry  # noqa: E402
+from src.infrastructure.api.repositories.report_history_repository import (  # noqa: E402
+    SQLiteReportHistoryRepository,
+)
+from src.infrastructure.write_behind import WriteBehindBuffer  # noqa: E402
+
+BASE = datetime(2026, 10, 19, 9, 0, tzinfo=timezone.utc)
+
+
+def _entry(i: int, user_id: str = "u1") -> ReportHistoryEntry:
+    # Segundos exactos a propósito: el cursor debe compararse igual que el texto guardado
+    return ReportHistoryEntry(
+        id=f"{i:032x}",
+        user_id=user_id,
+        actividades=[f"actividad {i}"],
+        report=f"reporte {i}",
+        created_at=(BASE + timedelta(seconds=i)).isoformat(timespec="microseconds"),
+    )
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return SQLiteReportHistoryRepository(str(tmp_path / "history.sqlite3"))
+
+
+def _service(repository, flush=None, **kwargs):
+    buffer = WriteBehindBuffer(flush or repository.insert_many, flush_interval=60, **kwargs)
+    return ReportHistoryService(repository, buffer)
+
+
+def _all_pages(service, limit):
+    async def run():
+        pages, cursor = [], None
+        while True:
+            page = await service.list_history("u1", limit, cursor)
+            pages.append([e.id for e in page.items])
+            if page.next_cursor is None:
+                return pages
+            cursor = page.next_cursor
+
+    return asyncio.run(run())
+
+
+def test_pagination_merges_stored_and_pending(repository):
+    service = _service(repository)
+    repository.insert_many([_entry(i) for i in range(5)] + [_entry(99, user_id="u2")])
+    for i in range(5, 8):
+        service.buffer.add(_entry(i))
+
+    pages = _all_pages(service, limit=3)
+
+    ids = [entry_id for page in pages for entry_id in page]
+    assert ids == [f"{i:032x}" for i in reversed(range(8))]
+    assert [len(page) for page in pages] == [3, 3, 2]
+
+
+def test_pending_entry_is_listed_once_after_flush(repository):
+    service = _service(repository)
+    service.buffer.add(_entry(1))
+
+    async def run():
+        await service.start()
+        await service.stop()
+        return await service.list_history("u1", 10)
+
+    page = asyncio.run(run())
+    assert [e.id for e in page.items] == [_entry(1).id]
+    assert service.buffer.pending() == []
+
+
+def test_batch_stays_visible_while_it_is_written(repository):
+    def slow_insert(entries):
+        time.sleep(0.3)
+        repository.insert_many(entries)
+
+    service = _service(repository, flush=slow_insert, batch_size=1)
+
+    async def run():
+        await service.start()
+        service.buffer.add(_entry(1))
+        await asyncio.sleep(0.1)  # el lote ya salió de la cola y se está escribiendo
+        during = await service.list_history("u1", 10)
+        await service.stop()
+        return during
+
+    during = asyncio.run(run())
+    assert [e.id for e in during.items] == [_entry(1).id]
+
+
+def test_stop_flushes_everything_pending(repository):
+    service = _service(repository, batch_size=2)
+    for i in range(5):
+        service.buffer.add(_entry(i))
+
+    async def run():
+        await service.start()
+        await service.stop()
+
+    asyncio.run(run())
+    assert len(repository.list_by_user("u1", 10)) == 5
+    assert service.buffer.pending() == []
+
+
+@pytest.mark.parametrize("cursor", ["no-es-base64", "WyJheWVyIiwgIngiXQ==", "WzEsIDJd"])
+def test_invalid_cursor_is_rejected(repository, cursor):
+    service = _service(repository)
+    with pytest.raises(InvalidCursorError):
+        asyncio.run(service.list_history("u1", 10, cursor))
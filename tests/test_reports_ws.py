@@ -0,0 +1,57 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+# Configuración mínima para importar los routers sin servicios externos
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("REPORT_HISTORY_STORE", "sqlite")
+os.environ.setdefault("REPORT_HISTORY_SQLITE_PATH", ":memory:")
+os.environ.setdefault("PERIOD_SUMMARY_STORE", "memory")
+
+from src.domain.models import ReportResponse, User  # noqa: E402
+from src.infrastructure.api.routers import reports_ws  # noqa: E402
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+
+class SlowReportService:
+    def __init__(self):
+        self.started = []
+
+    async def create_report(self, report_request, user):
+        self.started.append(report_request.actividades[0])
+        await asyncio.sleep(0.05)
+        return ReportResponse(report=f"Reporte de {report_request.actividades[0]}")
+
+
+def test_supersede_burst_keeps_newest_request(monkeypatch):
+    service = SlowReportService()
+    monkeypatch.setattr(reports_ws, "report_service", service)
+
+    async def run():
+        websocket = FakeWebSocket()
+        session = reports_ws.ReportSession(websocket, User(id="u1", email="u1@ejemplo.com"))
+        # Más mensajes seguidos que el límite por conexión, sin ceder entre ellos
+        for i in range(reports_ws.MAX_IN_FLIGHT_PER_CONNECTION + 2):
+            await session.handle({"type": "generate", "id": f"r{i}", "actividades": [f"a{i}"], "supersede": True})
+        await asyncio.gather(*session.tasks.values(), return_exceptions=True)
+        await asyncio.sleep(0)
+        return websocket.sent
+
+    sent = asyncio.run(run())
+    last = f"r{reports_ws.MAX_IN_FLIGHT_PER_CONNECTION + 1}"
+    assert not [m for m in sent if m["type"] == "error"]
+    results = [m for m in sent if m["type"] == "result"]
+    assert [m["id"] for m in results] == [last]
+    assert service.started == [f"a{reports_ws.MAX_IN_FLIGHT_PER_CONNECTION + 1}"]